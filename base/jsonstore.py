@@ -15,11 +15,19 @@
 import json
 import logging
 
+from base.writebehind import GhWriteBehind
 
+
+#
+# Json storage, written at once ( file replaced once fully written )
+#    writeBehind: save only requests a write in background ( see GhWriteBehind ), flush must be called on exit
+#
 class GhStorage:
 
     # init from json file
-    def __init__(self, json_file, label, content=None, version=0):
+    def __init__(self, json_file, label, content=None, version=0, writeBehind=False):
+        self.writeBehind = writeBehind
+        self.writer = GhWriteBehind(json_file, lambda: json.dumps(self.content, ensure_ascii=False, indent=4))
         if content is None:
             self.label = label
             self.json_file = json_file
@@ -62,14 +70,22 @@ class GhStorage:
         if self.json_file is not None:
             self.save()
 
+    # Write now, or later in write behind mode
     def save(self):
         if self.json_file is not None:
-            with open(self.json_file, "w", encoding='utf-8') as file:
-                json.dump(self.content, file, ensure_ascii=False, indent=4)
+            if self.writeBehind:
+                self.writer.schedule()
+            else:
+                self.writer.write()
                 logging.info("GhStorage: {} saved".format(self.json_file))
         else:
             logging.info("GhStorage: save ignored, not open from file")
 
+    # Write pending changes ( write behind mode ) now
+    def flush(self):
+        if self.json_file is not None:
+            self.writer.flush()
+
     def getVersion(self):
         return self.version
 
@@ -1,10 +1,24 @@
 import json
+from contextlib import contextmanager
 
+from base.writebehind import GhWriteBehind
 
+
+#
+# Dict of values stored in a json file
+#    save: file written at once ( replaced once fully written )
+#    set: value changed in memory only, the list is then dirty until written by flush or a pending scheduled save
+#    transaction: values changed within are written once at the end of the outermost transaction
+#    scheduleSave: file written in background ( see GhWriteBehind ), flush must be called on exit
+#
 class GhPersistentList:
 
     def __init__(self, path):
         self.path = path
+        self.transactions = 0
+        self.writer = GhWriteBehind(path, lambda: json.dumps(self.values))
+        # values and state
+        self.lock = self.writer.lock
         try:
             with open(path, 'r') as openfile:
                 self.values = json.load(openfile)
@@ -13,8 +27,11 @@ class GhPersistentList:
             self.save()
 
     def save(self):
-        with open(self.path, "w") as outfile:
-            json.dump(self.values, outfile)
+        self.writer.write()
+
+    # Write values if changed since last save
+    def flush(self):
+        self.writer.flush()
 
     def get(self, name):
         try:
@@ -23,4 +40,29 @@ class GhPersistentList:
             return ""
 
     def set(self, name, value):
-        self.values[name] = value
\ No newline at end of file
+        with self.lock:
+            if name in self.values and self.values[name] == value:
+                return
+            self.values[name] = value
+            self.writer.markDirty()
+
+    # with persistentList.transaction(): ...  -> values changed are written once, at the end
+    @contextmanager
+    def transaction(self):
+        with self.lock:
+            self.transactions = self.transactions + 1
+        try:
+            yield self
+        finally:
+            with self.lock:
+                self.transactions = self.transactions - 1
+                done = self.transactions == 0
+            if done:
+                self.flush()
+
+    # Request a save without waiting for it ( background thread ), flush must be called on exit
+    def scheduleSave(self):
+        with self.lock:
+            if self.transactions > 0:
+                return  # written at the end of the transaction
+            self.writer.schedule()
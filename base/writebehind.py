@@ -0,0 +1,102 @@
+# Copyright 2025 joetjo https://github.com/joetjo/OLA
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+import logging
+import os
+import threading
+
+
+#
+# File written at once ( replaced once fully written ), now or in background ( write behind )
+#    serialize: returns the content to write ( str ), called with lock held
+#    Write behind policy: schedule marks the file dirty and starts a timer of FLUSH_DELAY if none is pending,
+#       requests received meanwhile are written by the same write ( timer not restarted ): at most one write per
+#       FLUSH_DELAY and a change is never written later than FLUSH_DELAY after it has been requested
+#    Daemon timer is lost on exit: flush must be called when application quits
+#
+class GhWriteBehind:
+    FLUSH_DELAY = 2.0
+    # Attempts of flush when content is changed by another thread while serialized
+    FLUSH_ATTEMPTS = 3
+
+    def __init__(self, path, serialize):
+        self.path = path
+        self.serialize = serialize
+        self.dirty = False
+        self.timer = None
+        # lock: dirty state, timer and content serialization, writeLock: file ( a slow write does not block changes )
+        self.lock = threading.RLock()
+        self.writeLock = threading.Lock()
+
+    # Content changed, written by next flush
+    def markDirty(self):
+        with self.lock:
+            self.dirty = True
+
+    # Write now
+    #    RuntimeError raised if content has been changed by another thread while serialized ( still dirty )
+    def write(self):
+        with self.writeLock:
+            with self.lock:
+                self.cancel()
+                self.dirty = False
+                try:
+                    content = self.serialize()
+                except RuntimeError:
+                    self.dirty = True
+                    raise
+            tmpPath = "{}.tmp".format(self.path)
+            with open(tmpPath, "w", encoding='utf-8') as writer:
+                writer.write(content)
+            os.replace(tmpPath, self.path)
+
+    # Write now if changed since last write
+    def flush(self):
+        for attempt in range(GhWriteBehind.FLUSH_ATTEMPTS):
+            with self.lock:
+                if not self.dirty:
+                    self.cancel()
+                    return
+            try:
+                self.write()
+                return
+            except RuntimeError as e:
+                logging.warning("GhWriteBehind: {} changed while saved ({}), attempt {}".format(self.path, e, attempt + 1))
+        logging.error("GhWriteBehind: unable to save {}: content changed on each attempt".format(self.path))
+
+    # Write in background ( see write behind policy )
+    def schedule(self):
+        with self.lock:
+            self.dirty = True
+            if self.timer is None:
+                self.timer = threading.Timer(GhWriteBehind.FLUSH_DELAY, self.scheduledWrite)
+                self.timer.daemon = True
+                self.timer.start()
+
+    def scheduledWrite(self):
+        with self.lock:
+            self.timer = None
+        try:
+            self.flush()
+        except OSError as e:
+            logging.error("GhWriteBehind: unable to save {}: {}".format(self.path, e))
+            return
+        with self.lock:
+            if self.dirty and self.timer is None:
+                self.schedule()  # not written: content kept changing
+
+    def cancel(self):
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
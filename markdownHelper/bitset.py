@@ -0,0 +1,92 @@
+# Copyright 2025 joetjo https://github.com/joetjo/OLA
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+#
+# Bitset report engine: each file of the vault has a position, a set of files is an int with the bit of each file set
+#    files: dict key -> MhMarkdownFile sorted by key ( positions follow this order )
+#    tagIndex: MhTagIndex of files
+#    pathIndex: MhPathIndex of files
+#    Bitmaps of conditions are computed once per index
+#
+class MhBitsetIndex:
+
+    def __init__(self, files, tagIndex, pathIndex):
+        self.keys = list(files.keys())
+        self.files = list(files.values())
+        self.positions = {key: pos for pos, key in enumerate(self.keys)}
+        self.all = (1 << len(self.keys)) - 1
+        self.tagIndex = tagIndex
+        self.pathIndex = pathIndex
+        self.tagBitmaps = dict()
+        self.pathBitmaps = dict()
+
+    # Bitmap of the files with the keys provided
+    def bitmap(self, keys):
+        bitmap = bytearray(len(self.keys) // 8 + 1)
+        for key in keys:
+            pos = self.positions[key]
+            bitmap[pos >> 3] |= 1 << (pos & 7)
+        return int.from_bytes(bitmap, "little")
+
+    # Files with a tag like #XXXXX....  ( with prefix = 'XXXXX' )
+    def tagBits(self, prefix):
+        try:
+            return self.tagBitmaps[prefix]
+        except KeyError:
+            bits = self.bitmap(self.tagIndex.filesWithTagStartingBy(prefix))
+            self.tagBitmaps[prefix] = bits
+            return bits
+
+    # Files matching path condition ( see MhMarkdownFile.pathMatch )
+    def pathBits(self, path):
+        try:
+            return self.pathBitmaps[path]
+        except KeyError:
+            bits = self.bitmap(self.pathIndex.filesWithPath(path))
+            self.pathBitmaps[path] = bits
+            return bits
+
+    def allFiles(self):
+        return MhFileBits(self, self.all)
+
+
+#
+# Set of files of a MhBitsetIndex, used by reports like the dict key -> MhMarkdownFile it replaces ( read only )
+#
+class MhFileBits:
+
+    def __init__(self, index, bits):
+        self.index = index
+        self.bits = bits
+
+    def __len__(self):
+        return bin(self.bits).count("1")
+
+    # (key, MhMarkdownFile) in key order
+    def items(self):
+        keys = self.index.keys
+        files = self.index.files
+        digits = bin(self.bits)[:1:-1]  # digits[pos] is the bit of the file at pos
+        pos = digits.find("1")
+        while pos >= 0:
+            yield keys[pos], files[pos]
+            pos = digits.find("1", pos + 1)
+
+    def copy(self):
+        return self
+
+    # Returns files matching the condition bitmap and the others
+    def split(self, condition):
+        return MhFileBits(self.index, self.bits & condition), MhFileBits(self.index, self.bits & ~condition)
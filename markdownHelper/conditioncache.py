@@ -0,0 +1,59 @@
+# Copyright 2025 joetjo https://github.com/joetjo/OLA
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+import logging
+
+from markdownHelper.bitset import MhFileBits
+from markdownHelper.fileview import MhFileView
+
+
+#
+# Result of the condition of report blocs, shared by all reports of a generation run
+#    Reports using the same path_ref or content_ref evaluate the same conditions on the same files
+#    key: condition ( tags, paths, multi condition ) and content of the input files
+#
+class MhConditionCache:
+
+    def __init__(self):
+        self.results = dict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def filesKey(files):
+        if isinstance(files, MhFileView):
+            return files.positionsKey()
+        if isinstance(files, MhFileBits):
+            return files.bits
+        return tuple(files.keys())
+
+    # Returns files of entry inputFiles matching the entry condition and the others ( see MhEntry.splitFiles )
+    def split(self, entry):
+        key = (tuple(sorted(entry.tags)), tuple(sorted(entry.paths)), entry.multiCondition,
+               MhConditionCache.filesKey(entry.inputFiles))
+        try:
+            result = self.results[key]
+            self.hits = self.hits + 1
+        except KeyError:
+            result = entry.evaluate()
+            self.results[key] = result
+            self.misses = self.misses + 1
+        return result
+
+    # Statistics of a cache used elsewhere ( worker process )
+    def count(self, hits, misses):
+        self.hits = self.hits + hits
+        self.misses = self.misses + misses
+
+    def log(self):
+        logging.info("MDR | Condition cache: {} hits, {} misses, {} results".format(self.hits, self.misses, len(self.results)))
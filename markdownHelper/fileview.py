@@ -0,0 +1,67 @@
+# Copyright 2025 joetjo https://github.com/joetjo/OLA
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+from array import array
+
+
+#
+# Read only set of files of the vault, used by reports like the dict key -> MhMarkdownFile it replaces
+#    keys, files: tuples shared by all views of a vault snapshot ( sorted by key )
+#    positions: sorted positions in keys/files of the files of the view ( range for all files, array of unsigned int otherwise:
+#               4 bytes per file, no int object kept )
+#    Views are never copied: sub sets are new views sharing keys and files
+#
+class MhFileView:
+
+    def __init__(self, keys, files, positions=None):
+        self.keys = keys
+        self.files = files
+        if positions is None:
+            positions = range(len(keys))
+        self.positions = positions
+
+    def __len__(self):
+        return len(self.positions)
+
+    # (key, MhMarkdownFile) in key order
+    def items(self):
+        keys = self.keys
+        files = self.files
+        for pos in self.positions:
+            yield keys[pos], files[pos]
+
+    def copy(self):
+        return self
+
+    # Hashable value identifying the files of the view ( see MhConditionCache )
+    def positionsKey(self):
+        if isinstance(self.positions, range):
+            return self.positions
+        return self.positions.tobytes()
+
+    # View of the files at positions ( sorted )
+    def subset(self, positions):
+        return MhFileView(self.keys, self.files, array('I', positions))
+
+    # Returns files for which match(key, file) is True and the others
+    def split(self, match):
+        keys = self.keys
+        files = self.files
+        matching = array('I')
+        others = array('I')
+        for pos in self.positions:
+            if match(keys[pos], files[pos]):
+                matching.append(pos)
+            else:
+                others.append(pos)
+        return MhFileView(keys, files, matching), MhFileView(keys, files, others)
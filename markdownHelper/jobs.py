@@ -0,0 +1,176 @@
+# Copyright 2025 joetjo https://github.com/joetjo/OLA
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+import heapq
+import itertools
+import logging
+import threading
+
+
+class MhJobCancelled(Exception):
+    def __init__(self, job):
+        super().__init__("Job {} cancelled".format(job.name))
+        self.job = job
+
+
+#
+# Work on the vault requested to MhJobScheduler
+#    task: object with run(job), job must be given to the vault methods having checkpoints
+#    priority: lower value runs first
+#    key: pending jobs with the same key are coalesced ( None: never coalesced )
+#    preemptive: run at the next preemption checkpoint of a running job of lower priority
+#    resources: names of what the job writes ( report targets ), a job is not run while they are busy ( see checkpoint )
+#
+class MhJob:
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    CANCELLED = "cancelled"
+    FAILED = "failed"
+
+    def __init__(self, scheduler, task, priority, key, preemptive, name, resources=()):
+        self.scheduler = scheduler
+        self.task = task
+        self.priority = priority
+        self.key = key
+        self.preemptive = preemptive
+        self.name = name
+        self.resources = frozenset(resources)
+        self.state = MhJob.PENDING
+        self.cancelled = False
+
+    def cancel(self):
+        self.scheduler.cancel(self)
+
+    # Cancellation checkpoint: MhJobCancelled raised if cancel has been requested
+    #    preempt: the job is at a point where vault may be used by another job ( between two reports )
+    #    busy: resources still used by the job ( reports being generated by workers ), jobs using them are not run
+    def checkpoint(self, preempt=False, busy=()):
+        if self.cancelled:
+            raise MhJobCancelled(self)
+        if preempt:
+            self.scheduler.preempt(self, busy)
+
+
+#
+# Single thread owning the vault: jobs are run one at a time, by priority then in request order
+#    A running job lets preemptive jobs of higher priority run at its preemption checkpoints ( see MhJob.checkpoint )
+#
+class MhJobScheduler:
+
+    def __init__(self, name="vault"):
+        self.name = name
+        self.queue = []
+        self.pending = dict()  # key -> pending job
+        self.sequence = itertools.count()
+        self.running = []  # jobs running, preempted ones first
+        self.condition = threading.Condition()
+        self.stopped = False
+        self.thread = threading.Thread(target=self.loop, name="MhJobScheduler-{}".format(name), daemon=True)
+        self.thread.start()
+
+    # Returns the job queued, or the pending job with the same key ( merge(task of the pending job) called if set )
+    def submit(self, task, priority, key=None, preemptive=False, name=None, merge=None, resources=()):
+        with self.condition:
+            if key is not None and key in self.pending:
+                job = self.pending[key]
+                if merge is not None:
+                    merge(job.task)
+                logging.info("MDR | Job {} already requested".format(job.name))
+                return job
+            job = MhJob(self, task, priority, key, preemptive, name or str(key), resources)
+            heapq.heappush(self.queue, (priority, next(self.sequence), job))
+            if key is not None:
+                self.pending[key] = job
+            self.condition.notify()
+            return job
+
+    def cancel(self, job):
+        with self.condition:
+            job.cancelled = True
+            if job.state == MhJob.PENDING:
+                self.take(job)
+                job.state = MhJob.CANCELLED
+
+    # Pending jobs are dropped, running jobs are cancelled at their next checkpoint
+    def cancelAll(self):
+        with self.condition:
+            for priority, sequence, job in self.queue:
+                self.cancel(job)
+            for job in self.running:
+                job.cancelled = True
+
+    def stop(self, timeout=None):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+        self.cancelAll()
+        self.thread.join(timeout)
+
+    # Job removed from pending ones ( still in queue, skipped when reached )
+    def take(self, job):
+        if job.key is not None and self.pending.get(job.key) is job:
+            del self.pending[job.key]
+
+    def next(self):
+        while len(self.queue) > 0:
+            priority, sequence, job = heapq.heappop(self.queue)
+            if job.state == MhJob.PENDING:
+                self.take(job)
+                return job
+        return None
+
+    def loop(self):
+        while True:
+            with self.condition:
+                job = self.next()
+                while job is None and not self.stopped:
+                    self.condition.wait()
+                    job = self.next()
+                if job is None:
+                    return
+            self.execute(job)
+
+    # Preemptive jobs using busy resources stay pending ( run at a later checkpoint or in turn )
+    def preempt(self, current, busy=()):
+        while True:
+            with self.condition:
+                eligible = [(priority, sequence, job) for priority, sequence, job in self.queue
+                            if job.state == MhJob.PENDING and job.preemptive and priority < current.priority
+                            and job.resources.isdisjoint(busy)]
+                if len(eligible) == 0:
+                    return
+                priority, sequence, job = min(eligible)
+                self.take(job)
+            logging.info("MDR | Job {} preempted by {}".format(current.name, job.name))
+            self.execute(job)
+
+    def execute(self, job):
+        with self.condition:
+            if job.cancelled:
+                job.state = MhJob.CANCELLED
+                return
+            job.state = MhJob.RUNNING
+            self.running.append(job)
+        try:
+            job.task.run(job)
+            job.state = MhJob.DONE
+        except MhJobCancelled:
+            logging.info("MDR | Job {} cancelled".format(job.name))
+            job.state = MhJob.CANCELLED
+        except Exception as e:
+            logging.exception("MDR | Job {} failed: {}".format(job.name, e))
+            job.state = MhJob.FAILED
+        finally:
+            with self.condition:
+                self.running.remove(job)
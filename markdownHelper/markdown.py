@@ -13,15 +13,59 @@
 #   limitations under the License.
 import logging
 import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from re import search
 
 from base.setup import GhSetup
 
 from pathlib import Path
 
+from markdownHelper.conditioncache import MhConditionCache
+from markdownHelper.jobs import MhJobCancelled
 from markdownHelper.markdownfile import MhMarkdownFile
 from base.persistentList import GhPersistentList
-from markdownHelper.report import MhReport, ReferenceUtil
+from markdownHelper.report import MhReport, MhPlanCompiler, ReferenceUtil, InvalidReportSetup
+from markdownHelper.reportdeps import MhReportDeps
+from markdownHelper.reportsink import MhReportSink, MhStreamingSink
+from markdownHelper.snapshot import MhVaultSnapshot
+from markdownHelper.tagindex import MhTagIndex
+from markdownHelper.tagcache import MhTagCache
+
+
+# Executed within a worker process: parse a chunk of files
+#    Returns the data extracted from each file ( as stored in tag cache ) in the chunk order
+def parseMarkdownChunk(chunk, vaultLenPath):
+    return [MhMarkdownFile(key, path, vaultLenPath, None, mtime, size, resolved).cacheData()
+            for key, path, mtime, size, resolved in chunk]
+
+
+# Within a report worker process: vault snapshot and setup used by all reports generated by the process
+REPORT_WORKER = dict()
+
+
+# Executed within a report worker process at startup
+#    state is inherited when the process is forked, received pickled otherwise ( tag table must then be rebuilt )
+def initReportWorker(state):
+    table = MhMarkdownFile.TAG_TABLE
+    if len(table.tags) < len(state["tagNames"]):
+        table.tags = list(state["tagNames"])
+        table.tagIds = {tag: tagId for tagId, tag in enumerate(table.tags)}
+    REPORT_WORKER.update(state)
+    REPORT_WORKER["cache"] = MhConditionCache()
+
+
+# Executed within a report worker process: generate one report if required ( see MarkdownHelper.renderReport )
+#    Returns also the profile and the condition cache hits and misses of the report
+def generateReportInWorker(reportTitle, lastRun):
+    cache = REPORT_WORKER["cache"]
+    hits = cache.hits
+    misses = cache.misses
+    run, isWritten, profile = MarkdownHelper.renderReport(REPORT_WORKER["plans"][reportTitle], REPORT_WORKER["vault"],
+                                                          REPORT_WORKER["engine"], REPORT_WORKER["snapshot"], REPORT_WORKER["subContents"],
+                                                          REPORT_WORKER["reportsData"], lastRun, cache, REPORT_WORKER["flushSize"],
+                                                          REPORT_WORKER["profile"])
+    return run, isWritten, profile, cache.hits - hits, cache.misses - misses
 
 
 #
@@ -29,6 +73,12 @@ from markdownHelper.report import MhReport, ReferenceUtil
 #    ( Sample provided in example.markdownHelper.json )
 #
 class MarkdownHelper:
+    # Below this count of files to parse, worker processes startup costs more than it saves
+    PARALLEL_MIN_FILES = 200
+    # Below this count of reports to generate, reports are generated in current thread
+    PARALLEL_MIN_REPORTS = 4
+    REPORT_ENGINES = ["files", "bitset"]
+
     def __init__(self, vault=None, playtag="#PLAY/INPROGRESS"):
         self.SETUP = GhSetup('markdownHelper')
         if vault is not None:
@@ -41,13 +91,50 @@ class MarkdownHelper:
         self.IGNORE = self.SETUP.getBloc("global")["ignore"]
         self.REPORTS = self.SETUP.getBloc("global")["reports"]
         self.SUBCONTENT = self.SETUP.getBloc("global")["shared_contents"]
+        # Optional: count of processes used to parse files ( 0 or 1: parsing done in current thread )
+        self.PARSE_WORKERS = self.readValue(self.SETUP.getBloc("global"), "parse_workers", 0)
+        # Optional: count of processes used to generate reports ( 0 or 1: reports generated in current thread )
+        self.REPORT_WORKERS = self.readValue(self.SETUP.getBloc("global"), "report_workers", 0)
+        # Optional: "bitset" to evaluate report conditions on bitmaps of files, "files" ( default ) file by file
+        self.REPORT_ENGINE = self.readValue(self.SETUP.getBloc("global"), "report_engine", "files")
+        if self.REPORT_ENGINE not in MarkdownHelper.REPORT_ENGINES:
+            logging.warning("MDR | Unknown report engine \"{}\", allowed: {}".format(self.REPORT_ENGINE, MarkdownHelper.REPORT_ENGINES))
+            self.REPORT_ENGINE = "files"
+        # Optional: reports are written each time this count of characters is generated ( 0: written once fully generated )
+        self.REPORT_FLUSH_SIZE = self.readValue(self.SETUP.getBloc("global"), "report_flush_size", 0)
+        # Optional: True to profile the blocs of each report generated ( explain mode, may be switched from Reports tab )
+        #   reports are then always generated, profiles saved in PROFILES_FOLDER ( .profile.json and .profile.txt, never parsed )
+        self.REPORT_PROFILE = self.readValue(self.SETUP.getBloc("global"), "report_profile", False)
+        # Last profile of each report target ( MhReportProfile ), displayed in the Reports tab ( see profileDescription )
+        self.PROFILES = dict()
+        profilesPath = self.readValue(self.SETUP.getBloc("global"), "reports_profile_path",
+                                      os.path.join(os.path.dirname(self.SETUP.getBloc("global")["reports_info_path"]), "profiles"))
+        self.PROFILES_FOLDER = "{}/{}".format(self.VAULT, profilesPath)
         self.FILES = dict()
         self.PLAY = []
         self.SHEETS = dict()
         self.NOTES = GhPersistentList("{}/{}".format(self.VAULT,self.SETUP.getBloc("global")["notes_path"]))
         self.REPORT_INFO = GhPersistentList("{}/{}".format(self.VAULT,self.SETUP.getBloc("global")["reports_info_path"]))
+        # Tag cache stored next to reports info unless a dedicated path is set up
+        cachePath = self.readValue(self.SETUP.getBloc("global"), "tags_cache_path",
+                                   os.path.join(os.path.dirname(self.SETUP.getBloc("global")["reports_info_path"]), "tags_cache.json"))
+        self.TAG_CACHE = MhTagCache("{}/{}".format(self.VAULT, cachePath))
+        # Last run of each report ( reports with unchanged setup and files are not generated again )
+        depsPath = self.readValue(self.SETUP.getBloc("global"), "reports_deps_path",
+                                  os.path.join(os.path.dirname(self.SETUP.getBloc("global")["reports_info_path"]), "reports_deps.json"))
+        self.REPORT_DEPS = MhReportDeps("{}/{}".format(self.VAULT, depsPath))
+        # Parsed vault saved after each parsing and on exit, to be restored on next start
+        snapshotPath = self.readValue(self.SETUP.getBloc("global"), "vault_snapshot_path",
+                                      os.path.join(os.path.dirname(self.SETUP.getBloc("global")["reports_info_path"]), "vault_snapshot.bin"))
+        self.SNAPSHOT_FILE = "{}/{}".format(self.VAULT, snapshotPath)
         self.SORTED_FILES = dict()
+        self.TAG_INDEX = MhTagIndex(self.SORTED_FILES)
         self.TAGS = dict()
+        # folder -> mtime when listed ( staleness check of the snapshot )
+        self.FOLDERS = dict()
+        # Content used by reports, replaced on each parsing or update ( LOCK held )
+        self.LOCK = threading.RLock()
+        self.SNAPSHOT = MhVaultSnapshot(0, self.SORTED_FILES, self.TAGS, self.TAG_INDEX, dict(), self.FILES)
         self.TYPE_TAGS_UNSORTED = set()
         self.TYPE_TAGS = []
         self.PLAY_TAGS_UNSORTED = set()
@@ -55,46 +142,183 @@ class MarkdownHelper:
         self.REPORTS_GROUP = []
         # Initialized only when loading has been requested.
         self.reports = None
+        self.compileReports()
 
     def saveSetup(self):
         self.SETUP.save();
+        self.compileReports()
+
+    # Reports compiled once per setup loaded or saved ( MhBlocPlan by report title )
+    #    All reports are compiled before any report is generated: a setup error is raised on next generation
+    def compileReports(self):
+        compiler = MhPlanCompiler(self.SUBCONTENT)
+        self.PLANS = dict()
+        self.PLANS_ERROR = None
+        try:
+            for reportTitle, report in self.REPORTS.items():
+                report["title"] = reportTitle
+                self.PLANS[reportTitle] = compiler.compileReport(reportTitle, report)
+        except InvalidReportSetup as e:
+            logging.error("MDR | {}".format(e))
+            self.PLANS_ERROR = e
 
-    # folder: Path
+    # folder: String ( folder path )
     # shift: String ( String length provide the indentation level )
-    def processFolder(self, folder, shift):
+    # found: list filled with (key, Path, shift, mtime, size, resolved path) of each markdown file detected, in parsing order
+    #   Each folder is listed once, file metadata comes from the directory listing ( no extra stat per file )
+    #   Folder is resolved once, only symbolic links to files are resolved one by one
+    # job: MhJob running the parsing, checked for cancellation before each folder
+    def processFolder(self, folder, shift, found, job=None):
+        if job is not None:
+            job.checkpoint()
         logging.debug("MDR | {}{}".format(folder, shift))
         entryCount = 0
+        subFolders = []
 
-        # Loop on file in current folder
-        for entry in folder.iterdir():
-            if entry.is_file() and entry.name.endswith(".md") and entry.name not in self.IGNORE:
-                key = entry.name[0:len(entry.name) - 3]
-                entryCount = entryCount + 1
-                mdfile = MhMarkdownFile(key, entry, self.vaultLenPath)
-                self.FILES[key] = mdfile
-                logging.debug("MDR | {}>{} {}".format(shift, key.encode("utf-8"), mdfile.tags))
-                if len(mdfile.tagsComment) > 0:
-                    logging.debug("MDR | {}>>>> comments {}".format(shift, mdfile.tagsComment).encode("utf-8"))
-                playInProgress = False
-                for tag in mdfile.tags:
-                    self.TAGS[tag] = tag
-                    if tag == self.playtag:
-                        self.PLAY.append(mdfile)
-                        playInProgress = True
-                    self.SHEETS[key] = mdfile
-                for tag in mdfile.tags:
-                    if playInProgress and tag.startswith("#TYPE/"):  # List of TYPE tag used ( combo contents in tab Obsidian )
-                        self.TYPE_TAGS_UNSORTED.add(tag[6:])
-                    if tag.startswith("#PLAY/"):  # List in PLAY possible values ( combo contents in tab Session )
-                        self.PLAY_TAGS_UNSORTED.add(tag[6:])
+        self.FOLDERS[folder] = os.stat(folder).st_mtime
+        resolvedFolder = os.path.realpath(folder)
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if entry.name in self.IGNORE:
+                    continue
+                if not entry.is_file():
+                    subFolders.append(entry.path)
+                elif entry.name.endswith(".md"):
+                    key = entry.name[0:len(entry.name) - 3]
+                    entryCount = entryCount + 1
+                    stat = entry.stat()
+                    if entry.is_symlink():
+                        resolved = os.path.realpath(entry.path)
+                    else:
+                        resolved = os.path.join(resolvedFolder, entry.name)
+                    found.append((key, Path(entry.path), shift, stat.st_mtime, stat.st_size, resolved))
 
         # Loop on sub folder
-        for entry in folder.iterdir():
-            if not entry.is_file() and entry.name not in self.IGNORE:
-                entryCount = entryCount + self.processFolder(entry, "{}{}".format(shift, " "))
+        for subFolder in subFolders:
+            entryCount = entryCount + self.processFolder(subFolder, "{}{}".format(shift, " "), found, job)
 
         return entryCount
 
+    # found: list of (key, Path, shift, mtime, size, resolved path) as filled by processFolder
+    # Returns the list of MhMarkdownFile in the same order
+    def loadFiles(self, found):
+        mdfiles = [None] * len(found)
+        toParse = []
+        for i, (key, path, shift, mtime, size, resolved) in enumerate(found):
+            localPath = str(path)[self.vaultLenPath:]
+            cached = self.TAG_CACHE.lookup(localPath, mtime, size)
+            if cached is not None:
+                mdfiles[i] = MhMarkdownFile(key, path, self.vaultLenPath, cached, mtime, size, resolved)
+            else:
+                toParse.append((i, localPath))
+
+        parsed = self.parseFiles([(found[i][0], found[i][1], found[i][3], found[i][4], found[i][5]) for i, localPath in toParse])
+        for (i, localPath), mdfile in zip(toParse, parsed):
+            self.TAG_CACHE.store(localPath, mdfile.lastModif, mdfile.size, mdfile)
+            mdfiles[i] = mdfile
+
+        return mdfiles
+
+    # files: list of (key, Path, mtime, size, resolved path) to read
+    # Returns list of MhMarkdownFile in the same order
+    def parseFiles(self, files):
+        if self.PARSE_WORKERS <= 1 or len(files) < MarkdownHelper.PARALLEL_MIN_FILES:
+            return [MhMarkdownFile(key, path, self.vaultLenPath, None, mtime, size, resolved)
+                    for key, path, mtime, size, resolved in files]
+
+        chunkSize = max(1, len(files) // (self.PARSE_WORKERS * 4))
+        chunks = [files[i:i + chunkSize] for i in range(0, len(files), chunkSize)]
+        logging.info("MDR | Parsing {} files with {} processes ({} chunks)".format(len(files), self.PARSE_WORKERS, len(chunks)))
+        result = []
+        with ProcessPoolExecutor(max_workers=self.PARSE_WORKERS) as executor:
+            for chunk, chunkData in zip(chunks, executor.map(parseMarkdownChunk, chunks, [self.vaultLenPath] * len(chunks))):
+                for (key, path, mtime, size, resolved), data in zip(chunk, chunkData):
+                    result.append(MhMarkdownFile(key, path, self.vaultLenPath, data, mtime, size, resolved))
+        return result
+
+    def registerFile(self, key, mdfile, shift=""):
+        self.FILES[key] = mdfile
+        logging.debug("MDR | {}>{} {}".format(shift, key.encode("utf-8"), mdfile.tags))
+        if mdfile.tagsComment is not None and len(mdfile.tagsComment) > 0:
+            logging.debug("MDR | {}>>>> comments {}".format(shift, mdfile.tagsComment).encode("utf-8"))
+        self.indexFile(key, mdfile)
+
+    def indexFile(self, key, mdfile):
+        tags = mdfile.tags
+        if len(tags) == 0:
+            return
+        self.TAGS.update(zip(tags, tags))
+        self.SHEETS[key] = mdfile
+        playInProgress = self.playtag in tags
+        if playInProgress:
+            self.PLAY.extend([mdfile] * tags.count(self.playtag))
+        for tag in tags:
+            if playInProgress and tag.startswith("#TYPE/"):  # List of TYPE tag used ( combo contents in tab Obsidian )
+                self.TYPE_TAGS_UNSORTED.add(tag[6:])
+            if tag.startswith("#PLAY/"):  # List in PLAY possible values ( combo contents in tab Session )
+                self.PLAY_TAGS_UNSORTED.add(tag[6:])
+
+    # Sorted views of the vault content ( rebuilt after each parsing or update )
+    def sortVault(self):
+        sortedFiles = dict()
+        for key in sorted(self.FILES):
+            sortedFiles[key] = self.FILES[key]
+        self.SORTED_FILES = sortedFiles
+        self.TAG_INDEX = MhTagIndex(sortedFiles)
+        self.TYPE_TAGS = sorted(self.TYPE_TAGS_UNSORTED)
+        self.PLAY_TAGS = sorted(self.PLAY_TAGS_UNSORTED)
+        self.SNAPSHOT = MhVaultSnapshot(self.SNAPSHOT.generation + 1, self.SORTED_FILES, self.TAGS, self.TAG_INDEX,
+                                        self.FOLDERS.copy(), self.FILES)
+
+    # Update vault content with files modified since parsing ( no full parsing )
+    # changed: list of created or modified path ( markdown file or folder to parse )
+    # deleted: list of removed path ( markdown file or folder )
+    def applyChanges(self, changed, deleted):
+        # Same form as parsed paths ( see parseVault ): compared as strings
+        changed = [str(Path(path)) for path in changed]
+        deleted = [str(Path(path)) for path in deleted]
+        with self.LOCK:
+            self.FILES = self.FILES.copy()  # a report may be iterating on previous content
+            removed = 0
+            for path in deleted:
+                prefix = os.path.join(path, "")
+                for folder in [f for f in self.FOLDERS if f == path or f.startswith(prefix)]:
+                    del self.FOLDERS[folder]
+                for key in [k for k, f in self.FILES.items() if str(f.path) == path or str(f.path).startswith(prefix)]:
+                    logging.debug("MDR | Removed {}".format(key.encode("utf-8")))
+                    del self.FILES[key]
+                    removed = removed + 1
+
+            found = []
+            for path in changed:
+                name = os.path.basename(path)
+                if os.path.isdir(path):
+                    self.processFolder(path, "", found)
+                elif name.endswith(".md") and name not in self.IGNORE and os.path.isfile(path):
+                    stat = os.stat(path)
+                    found.append((name[0:len(name) - 3], Path(path), "", stat.st_mtime, stat.st_size, os.path.realpath(path)))
+            # Folders containing the changes are up to date
+            for path in changed + deleted:
+                folder = os.path.dirname(path)
+                if folder in self.FOLDERS and os.path.isdir(folder):
+                    self.FOLDERS[folder] = os.stat(folder).st_mtime
+
+            # Tags of updated or removed files may not be used anymore: tag lists rebuilt from memory
+            self.TAGS = dict()
+            self.TYPE_TAGS_UNSORTED = set()
+            self.PLAY_TAGS_UNSORTED = set()
+            self.SHEETS = dict()
+            self.PLAY = []
+            loaded = set()
+            for (key, path, shift, mtime, size, resolved), mdfile in zip(found, self.loadFiles(found)):
+                self.registerFile(key, mdfile, shift)
+                loaded.add(key)
+            for key, mdfile in self.FILES.items():
+                if key not in loaded:
+                    self.indexFile(key, mdfile)
+            self.sortVault()
+            logging.info("MDR | Vault updated: {} files changed, {} removed, {} md files".format(len(found), removed, len(self.FILES)))
+
     @staticmethod
     def readValue(report, name, default):
         try:
@@ -116,6 +340,13 @@ class MarkdownHelper:
         desc.append("\n #{}".format(" #".join(str(x) for x in allTagsDetected.keys())))
         return "<br>".join(str(x) for x in desc)
 
+    # Last profile of the report for the Reports tab ( not part of the description written in the report )
+    def profileDescription(self, target):
+        try:
+            return "<br><hr>\n{}".format(self.PROFILES[target].description())
+        except KeyError:
+            return ""  # report not profiled
+
     def generateReportBlocDescription(self, bloc, desc, allTagsDetected, level ):
         shift = "&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;| "
         # TITLE
@@ -181,56 +412,212 @@ class MarkdownHelper:
         self.REPORTS_GROUP = self.reports.keys()
         return self.reports
 
-    def parseVault(self, initReportsList=True):
-        logging.info("MDR | Markdown vault: {}".format(self.VAULT))
-        count = self.processFolder(Path(self.VAULT), "")
+    # New collections before loading the vault content: current snapshot may be in use by a report
+    def clearVault(self):
+        self.FILES = dict()
+        self.TAGS = dict()
+        self.TYPE_TAGS_UNSORTED = set()
+        self.PLAY_TAGS_UNSORTED = set()
+        self.SHEETS = dict()
+        self.PLAY = []
+
+    # job: MhJob running the parsing ( may be cancelled while folders are listed: vault is then left unchanged )
+    def parseVault(self, initReportsList=True, job=None):
+        with self.LOCK:
+            logging.info("MDR | Markdown vault: {}".format(self.VAULT))
+            previous = (self.FILES, self.TAGS, self.TYPE_TAGS_UNSORTED, self.PLAY_TAGS_UNSORTED, self.SHEETS, self.PLAY, self.FOLDERS)
+            self.clearVault()
+            self.FOLDERS = dict()
+            found = []
+            try:
+                count = self.processFolder(str(Path(self.VAULT)), "", found, job)
+            except MhJobCancelled:
+                self.FILES, self.TAGS, self.TYPE_TAGS_UNSORTED, self.PLAY_TAGS_UNSORTED, self.SHEETS, self.PLAY, self.FOLDERS = previous
+                raise
+            # Merge done in parsing order whatever the parsing mode to keep the same result
+            for (key, path, shift, mtime, size, resolved), mdfile in zip(found, self.loadFiles(found)):
+                self.registerFile(key, mdfile, shift)
+            self.TAG_CACHE.prune()
+            self.TAG_CACHE.save()
 
-        logging.info("MDR | > {} md files detected".format(count))
-        logging.info("MDR | > {} tags detected".format(len(self.TAGS)))
+            logging.info("MDR | > {} md files detected".format(count))
+            logging.info("MDR | > {} tags detected".format(len(self.TAGS)))
 
-        for key in sorted(self.FILES):
-            self.SORTED_FILES[key] = self.FILES[key]
+            self.sortVault()
+            self.saveSnapshot()
 
-        for t in sorted(self.TYPE_TAGS_UNSORTED):
-            self.TYPE_TAGS.append(t)
+            if initReportsList:
+                self.cacheReportsList()
 
-        for t in sorted(self.PLAY_TAGS_UNSORTED):
-            self.PLAY_TAGS.append(t)
+    def saveSnapshot(self):
+        with self.LOCK:
+            if self.SNAPSHOT.generation == 0:
+                return
+            try:
+                self.SNAPSHOT.save(self.SNAPSHOT_FILE, self.VAULT)
+            except OSError as e:
+                logging.warning("MDR | Unable to save vault snapshot {}: {}".format(self.SNAPSHOT_FILE, e))
 
-        if initReportsList:
+    # Restore vault content as saved by saveSnapshot ( vault may have been modified since: see refresh )
+    # Returns False if no valid snapshot is available ( parsing required )
+    def loadSnapshot(self):
+        data = MhVaultSnapshot.read(self.SNAPSHOT_FILE, self.VAULT)
+        if data is None:
+            return False
+        with self.LOCK:
+            self.clearVault()
+            for key, path, resolvedPath, lastModif, size, tagIds, long, comments in data["files"]:
+                mdfile = MhMarkdownFile(key, Path(path), self.vaultLenPath, {"tagIds": tagIds, "comments": comments, "long": long},
+                                        lastModif, size, resolvedPath)
+                self.FILES[key] = mdfile
+                self.indexFile(key, mdfile)
+            self.FOLDERS = data["folders"]
+            self.sortVault()
             self.cacheReportsList()
+        logging.info("MDR | Vault restored from snapshot {}: {} md files, {} tags".format(self.SNAPSHOT_FILE, len(self.FILES), len(self.TAGS)))
+        return True
+
+    # Parse the vault only if its content may have changed since the current snapshot
+    # Returns the snapshot to use
+    def refresh(self, job=None):
+        with self.LOCK:
+            if self.SNAPSHOT.isStale():
+                self.parseVault(initReportsList=False, job=job)
+            else:
+                logging.info("MDR | Vault unchanged, parsing {} reused".format(self.SNAPSHOT.generation))
+            return self.SNAPSHOT
+
+    # Generate the report file unless the setup of the report and the files it depends on are those of its last run
+    #    plan: compiled report ( MhBlocPlan )
+    #    lastRun: entry of MhReportDeps recorded by the last run of the report ( None if unknown )
+    #    cache: MhConditionCache of the generation run
+    #    flushSize: see report_flush_size setup
+    #    profile: True to profile the report ( explain mode ), report is then always generated
+    #    Returns the entry of this run, True if the report file has been written ( content changed ) and the profile if requested
+    @staticmethod
+    def renderReport(plan, vault, engine, snapshot, subContents, reportsData, lastRun, cache, flushSize=0, profile=False):
+        report = plan.json
+        if engine == "bitset":
+            files = snapshot.bitset().allFiles()
+        else:
+            files = snapshot.fileView()
+        mhReport = MhReport(plan, vault, files, snapshot.tags, reportsData, snapshot.tagIndex, cache,
+                            snapshot.pathIndex(), profile)
+        config, conditionTags = MhReportDeps.analyse(report, subContents)
+        run = {"config": config, "selection": MhReportDeps.selectionDigest(mhReport.sourceFiles(), conditionTags)}
+        if not profile and MhReportDeps.isUnchanged(lastRun, run, snapshot.files, mhReport.target()):
+            logging.info("MDR | Report \"{}\" unchanged".format(report["title"]))
+            return lastRun, False, None
+        if flushSize > 0:
+            sink = MhStreamingSink(mhReport.target(), flushSize)
+        else:
+            sink = MhReportSink(mhReport.target())
+        run["count"] = mhReport.generate(MhReportDeps.targetHash(lastRun, mhReport.target()), sink)
+        run["hash"] = mhReport.contentHash
+        run["files"] = {key: snapshot.files[key].lastModif for key in sorted(mhReport.listedFiles)}
+        run["mtime"] = os.path.getmtime(mhReport.target())
+        return run, mhReport.written, mhReport.profile
+
+    # reports: list of (reportTitle, report) to generate
+    # Reports info and dependencies are updated once all reports are processed
+    # job: MhJob running the generation, checked between two reports ( cancellation or preemption by another job )
+    # Returns the list of path of the files written
+    def processReports(self, reports, signal_report, snapshot, job=None):
+        if self.PLANS_ERROR is not None:
+            raise self.PLANS_ERROR
+        plans = self.PLANS
+        for reportTitle, report in reports:
+            # A report may list reports: comments are those parsed, not those of a report being written
+            mdfile = snapshot.files.get(os.path.basename(report["target"])[0:-3])
+            if mdfile is not None and mdfile.tagsComment is None:
+                mdfile.loadComments()
+        written = []
+        cache = MhConditionCache()
+        # Reports info written once, when all reports are processed
+        with self.REPORT_INFO.transaction():
+            if self.REPORT_WORKERS <= 1 or len(reports) < MarkdownHelper.PARALLEL_MIN_REPORTS:
+                current = 1
+                for reportTitle, report in reports:
+                    if job is not None:
+                        job.checkpoint(preempt=True)
+                    logging.info("MDR | Processing report \"{}\" {}/{}".format(reportTitle, current, len(reports)))
+                    run, isWritten, profile = MarkdownHelper.renderReport(plans[reportTitle], self.VAULT, self.REPORT_ENGINE, snapshot,
+                                                                          self.SUBCONTENT, self.reports, self.REPORT_DEPS.lookup(report["target"]),
+                                                                          cache, self.REPORT_FLUSH_SIZE, self.REPORT_PROFILE)
+                    self.reportProcessed(reportTitle, report, run, isWritten, profile, signal_report, written)
+                    current = current + 1
+            else:
+                logging.info("MDR | Processing {} reports with {} processes".format(len(reports), self.REPORT_WORKERS))
+                # Built before workers startup to be shared by all of them
+                if self.REPORT_ENGINE == "bitset":
+                    snapshot.bitset()
+                else:
+                    snapshot.fileView()
+                state = {"vault": self.VAULT, "engine": self.REPORT_ENGINE, "snapshot": snapshot, "subContents": self.SUBCONTENT,
+                         "reportsData": self.reports, "plans": plans, "tagNames": MhMarkdownFile.TAG_TABLE.tags,
+                         "flushSize": self.REPORT_FLUSH_SIZE, "profile": self.REPORT_PROFILE}
+                with ProcessPoolExecutor(max_workers=self.REPORT_WORKERS, initializer=initReportWorker, initargs=(state,)) as executor:
+                    pending = {executor.submit(generateReportInWorker, reportTitle, self.REPORT_DEPS.lookup(report["target"])):
+                               (reportTitle, report) for reportTitle, report in reports}
+                    current = 1
+                    for future in as_completed(pending):
+                        reportTitle, report = pending[future]
+                        logging.info("MDR | Report \"{}\" processed {}/{}".format(reportTitle, current, len(reports)))
+                        run, isWritten, profile, hits, misses = future.result()
+                        cache.count(hits, misses)
+                        self.reportProcessed(reportTitle, report, run, isWritten, profile, signal_report, written)
+                        current = current + 1
+                        if job is not None:
+                            try:
+                                # targets not generated yet must not be written meanwhile by a preempting job
+                                busy = {queued["target"] for other, (title, queued) in pending.items() if not other.done()}
+                                job.checkpoint(preempt=True, busy=busy)
+                            except MhJobCancelled:
+                                executor.shutdown(wait=True, cancel_futures=True)
+                                raise
+        cache.log()
+        self.REPORT_DEPS.save()
+        return written
 
-    def processReport(self, reportTitle, report, current, total, signal_report):
-        logging.info("MDR | Processing report \"{}\" {}/{}".format(reportTitle, current, total))
+    def reportProcessed(self, reportTitle, report, run, isWritten, profile, signal_report, written):
         sname = os.path.basename(report["target"])
         sname = sname[0:len(sname) - 3]
-        try:
-            ctag = report["commentTag"]
-        except KeyError:
-            ctag = "X"
-        report["title"] = reportTitle
-        lineDisplayedCount = MhReport(report, self.VAULT, self.SORTED_FILES, self.TAGS, self.SUBCONTENT, self.reports).generate()
-        self.REPORT_INFO.set(sname, lineDisplayedCount)
-        self.REPORT_INFO.save()
+        self.REPORT_INFO.set(sname, run["count"])
+        self.REPORT_DEPS.store(report["target"], run, isWritten)
+        if profile is not None:
+            self.PROFILES[report["target"]] = profile
+            profile.save(self.PROFILES_FOLDER)
+        if isWritten:
+            written.append(os.path.normpath("{}/{}".format(self.VAULT, report["target"])))
         signal_report.emit(reportTitle, report["target"])
 
-    def generateReport(self, target, signal_reports, signal_report):
-        self.parseVault(initReportsList=True)
+    # Reports written within parsed folders of the vault are applied to the snapshot ( vault remains up to date )
+    def reportsWritten(self, targets):
+        changed = [target for target in targets if os.path.dirname(target) in self.FOLDERS]
+        if len(changed) > 0:
+            self.applyChanges(changed, [])
+
+    # job: MhJob running the generation ( see MhJobScheduler ), None if run directly
+    def generateReport(self, target, signal_reports, signal_report, job=None):
+        snapshot = self.refresh(job)
+        self.cacheReportsList()
 
-        for reportTitle, report in self.REPORTS.items():
-            if report["target"] == target:
-                self.processReport(reportTitle, report, 1, 1, signal_report)
+        reports = [(reportTitle, report) for reportTitle, report in self.REPORTS.items() if report["target"] == target]
+        self.reportsWritten(self.processReports(reports, signal_report, snapshot, job))
 
-    def generateAllReports(self, signal_reports, signal_report, reload=False):
+    # Returns the count of report files written and the count of reports unchanged
+    def generateAllReports(self, signal_reports, signal_report, reload=False, job=None):
         try:
-            if reload or len(self.SORTED_FILES) == 0:
-                self.parseVault()
+            if reload:
+                self.parseVault(job=job)
+                snapshot = self.SNAPSHOT
+            else:
+                snapshot = self.refresh(job)
 
             signal_reports.emit(self.cacheReportsList())
-            current = 1
-            for reportTitle, report in self.REPORTS.items():
-                self.processReport(reportTitle, report, current, len(self.REPORTS), signal_report)
-                current = current + 1
+            written = self.processReports(list(self.REPORTS.items()), signal_report, snapshot, job)
+            self.reportsWritten(written)
+            return len(written), len(self.REPORTS) - len(written)
 
         except Exception as e:
             raise e
@@ -11,76 +11,221 @@
 #   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 #   See the License for the specific language governing permissions and
 #   limitations under the License.
+import logging
 import os.path
 import re
+import threading
+from array import array
+
+
+#
+# Vault wide tag dictionary: each distinct tag string is stored once and identified by an int
+#
+class MhTagTable:
+
+    def __init__(self):
+        self.tagIds = dict()  # tag -> id
+        self.tags = []  # id -> tag
+        self.lock = threading.Lock()
+
+    def tagId(self, tag):
+        try:
+            return self.tagIds[tag]
+        except KeyError:
+            with self.lock:
+                if tag not in self.tagIds:
+                    self.tags.append(tag)
+                    self.tagIds[tag] = len(self.tags) - 1
+                return self.tagIds[tag]
+
+    # Returns the array of ids of the tags
+    def encode(self, tags):
+        try:
+            return array('I', map(self.tagIds.__getitem__, tags))  # tags already known ( most of the time )
+        except KeyError:
+            return array('I', [self.tagId(tag) for tag in tags])
+
+    # Returns the id of tag if already known, None otherwise ( no file has this tag )
+    def find(self, tag):
+        return self.tagIds.get(tag)
 
 
 class MhMarkdownFile:
+    __slots__ = ("name", "path", "localPath", "resolvedPath", "lastModif", "size", "matchTag", "tagsComment", "tagIds", "long")
     LONG_SHEET_HEADER_LINE = 60
     LONG_SHEET_COMMENT_LEN = 50
+    HEADER_CHUNK_SIZE = 4096
+    # Tag as always extracted: followed by a character kept unless it is a space ( a tag ending the text loses its last
+    #    character to the following one )
+    TAG = re.compile(r"#[\w|/_-]+(?:\S|(?=\s))")
+    # Tag at the beginning of a line ( text searched prefixed by a line end ) and the rest of the line without trailing
+    #    spaces ( extended comment ), lines without comment do not match
+    LINE_TAG = re.compile(r"\n(#[\w|/_-]+)(?![\w|/_-])([^\n]*\S)")
+    HEADER = re.compile(rb"(?:[^\n]*\n){%d}" % LONG_SHEET_HEADER_LINE)
+    TAG_TABLE = MhTagTable()
 
     # name : String
     # path : Path from PathLib
-    def __init__(self, name, path, vaultLenPath):
+    # cached : entry from MhTagCache ( file is not read if provided ), tags may be provided as tagIds array instead
+    # lastModif, size : file metadata when already known by caller ( read from file system otherwise )
+    # resolvedPath : absolute path with symbolic links resolved when already known by caller ( resolved otherwise )
+    def __init__(self, name, path, vaultLenPath, cached=None, lastModif=None, size=None, resolvedPath=None):
         # String
         self.name = name
         # WindowsPath ( from pathLib )
         self.path = path
         self.localPath = str(path)[vaultLenPath:]
-        self.lastModif = os.path.getmtime(path)
-        self.tags = []
-        self.tagsComment = dict()
-        self.platforms = []
-        self.type_tags = []
-        self.play_tags = []
-        self.loadTags()
+        # String used by path conditions of reports
+        if resolvedPath is None:
+            resolvedPath = str(path.resolve())
+        self.resolvedPath = resolvedPath
+        if lastModif is None:
+            lastModif = os.path.getmtime(path)
+        self.lastModif = lastModif
+        self.size = size
         self.matchTag = None
-        self.long = False
+        # Extracted on first access to getTagComment ( None until then )
+        self.tagsComment = None
+        if cached is None:
+            self.long = False
+            self.loadTags()
+        else:
+            try:
+                self.tagIds = cached["tagIds"]  # already encoded with TAG_TABLE
+            except KeyError:
+                self.tagIds = MhMarkdownFile.TAG_TABLE.encode(cached["tags"])
+            self.tagsComment = cached["comments"]
+            self.long = cached["long"]
+
+    # Tags of the file ( strings, in file order )
+    @property
+    def tags(self):
+        names = MhMarkdownFile.TAG_TABLE.tags
+        return [names[tagId] for tagId in self.tagIds]
+
+    @property
+    def platforms(self):
+        return [tag[10:] for tag in self.tags if tag.startswith("#PLATFORM")]
+
+    @property
+    def type_tags(self):
+        return [tag[6:] for tag in self.tags if tag.startswith("#TYPE")]
 
+    @property
+    def play_tags(self):
+        return [tag[6:] for tag in self.tags if tag.startswith("#PLAY")]
+
+    # Only the header of the file is read ( LONG_SHEET_HEADER_LINE lines + the line flagging a long sheet )
+    def readHeader(self):
+        raw = b""
+        # Unbuffered, end of file known from the size when set: a single read for most sheets
+        with open(self.path, 'rb', buffering=0) as reader:
+            while True:
+                chunk = reader.read(MhMarkdownFile.HEADER_CHUNK_SIZE)
+                raw = raw + chunk
+                if len(chunk) == 0 or (self.size is not None and len(raw) >= self.size):
+                    break
+                # a trailing \r may be the beginning of a \r\n line end
+                if not raw.endswith(b"\r") and MhMarkdownFile.lineEnds(raw) > MhMarkdownFile.LONG_SHEET_HEADER_LINE:
+                    break
+        # Same line ends as text mode reading ( universal newlines )
+        if b"\r" in raw:
+            raw = raw.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+        return raw
+
+    @staticmethod
+    def lineEnds(raw):
+        if b"\r" in raw:
+            return raw.count(b"\n") + raw.count(b"\r") - raw.count(b"\r\n")
+        return raw.count(b"\n")
+
+    # Position of the lines starting with char
+    @staticmethod
+    def lineStarts(text, char):
+        result = [0] if text.startswith(char) else []
+        pos = text.find("\n" + char)
+        while pos >= 0:
+            result.append(pos + 1)
+            pos = text.find("\n" + char, pos + 1)
+        return result
+
+    # Returns the header text ( LONG_SHEET_HEADER_LINE lines ) and the line flagging a long sheet ( None if short )
+    def readLines(self):
+        data = self.readHeader()
+        header = None
+        if data.count(b"\n") >= MhMarkdownFile.LONG_SHEET_HEADER_LINE:
+            header = MhMarkdownFile.HEADER.match(data)
+        if header is not None and header.end() < len(data):
+            text = data[0:header.end()].decode('utf8')
+            lineEnd = data.find(b"\n", header.end())
+            if lineEnd >= 0:
+                longLine = data[header.end():lineEnd + 1].decode('utf8')
+            else:
+                longLine = data[header.end():].decode('utf8')
+        else:
+            text = data.decode('utf8')
+            longLine = None
+        return text, longLine
+
+    # Quick scan done at parse time: tags only, comments are extracted by loadComments when required
     def loadTags(self):
-        with open(self.path, 'r', encoding='utf8') as reader:
-            count = 0
-            for line in reader:
-                count = count + 1
-                if line.startswith("|"):
-                    self.tags.append("#LONGSHEET/PIPE/LINE/{}".format(count))
-
-                if count > MhMarkdownFile.LONG_SHEET_HEADER_LINE:
-                    self.long = True
-                    self.tags.append("#LONGSHEET/SIZE/{}".format(os.path.getsize(self.path)))
-                    if len(line) > MhMarkdownFile.LONG_SHEET_COMMENT_LEN:
-                        comment = "{}...".format(line[0:MhMarkdownFile.LONG_SHEET_COMMENT_LEN])
-                    else:
-                        comment = line[0:len(line)-1]
-                    self.tagsComment["#INFO"] = [ "<pre>{}</pre>".format(comment.replace("|", " ")) ]
-                    return
-
-                # Search for tag beginning of line for extended comment
-                if line.startswith("#"):
-                    lineTags = re.findall(r"^#[\w|/_-]+", line)
-                    if len(lineTags) > 0:
-                        lineTag = lineTags[0]
-                        comment = line[len(lineTag):len(line)].rstrip()
-                        if len(comment) > 0:
-                            try:
-                                comments = self.tagsComment[lineTag]
-                            except KeyError:
-                                comments = []
-                                self.tagsComment[lineTag] = comments
-                            comments.append(comment)
-                # Extract all tags
-                rawTags = re.findall(r"#[\w|/_-]+[\s\S]", line)
-                for tag in rawTags:
-                    stag = tag.rstrip()
-                    self.tags.append(stag)
-                    if stag.startswith("#PLATFORM"):
-                        self.platforms.append(stag[10:])
-                    if stag.startswith("#TYPE"):
-                        self.type_tags.append(stag[6:])
-                    if stag.startswith("#PLAY"):
-                        self.play_tags.append(stag[6:])
+        text, longLine = self.readLines()
+
+        # Table lines are tagged before the tags of the line ( a tag never spans a line end )
+        tags = []
+        start = 0
+        lineCount = 1
+        for pipe in MhMarkdownFile.lineStarts(text, "|"):
+            tags.extend(MhMarkdownFile.TAG.findall(text, start, pipe))
+            lineCount = lineCount + text.count("\n", start, pipe)
+            tags.append("#LONGSHEET/PIPE/LINE/{}".format(lineCount))
+            start = pipe
+        tags.extend(MhMarkdownFile.TAG.findall(text, start))
+
+        if longLine is not None:
+            if longLine.startswith("|"):
+                tags.append("#LONGSHEET/PIPE/LINE/{}".format(MhMarkdownFile.LONG_SHEET_HEADER_LINE + 1))
+            self.long = True
+            if self.size is None:
+                self.size = os.path.getsize(self.path)
+        self.tagIds = MhMarkdownFile.TAG_TABLE.encode(tags)
+        if self.long:
+            # size tag is seldom shared with another file: encoded alone
+            self.tagIds.append(MhMarkdownFile.TAG_TABLE.tagId("#LONGSHEET/SIZE/{}".format(self.size)))
+
+    # Extended comments ( text following a tag at the beginning of a line ) and #INFO of long sheets
+    #    Header is read again: comments are those of the file contents at first access
+    def loadComments(self):
+        self.tagsComment = dict()
+        try:
+            text, longLine = self.readLines()
+        except OSError as e:
+            logging.warning("MDR | {}: comments not available ({})".format(self.localPath, e))
+            return
+
+        # Tag beginning of line for extended comment
+        for lineTag, comment in MhMarkdownFile.LINE_TAG.findall("\n" + text):
+            try:
+                self.tagsComment[lineTag].append(comment)
+            except KeyError:
+                self.tagsComment[lineTag] = [comment]
+
+        if longLine is not None:
+            if len(longLine) > MhMarkdownFile.LONG_SHEET_COMMENT_LEN:
+                comment = "{}...".format(longLine[0:MhMarkdownFile.LONG_SHEET_COMMENT_LEN])
+            else:
+                comment = longLine[0:len(longLine) - 1]
+            self.tagsComment["#INFO"] = ["<pre>{}</pre>".format(comment.replace("|", " "))]
+
+    # Extracted data as stored in MhTagCache and accepted as cached parameter
+    def cacheData(self):
+        return {"tags": self.tags,
+                "comments": self.tagsComment,
+                "long": self.long}
 
     def getTagComment(self, tag):
+        if self.tagsComment is None:
+            self.loadComments()
         try:
             return self.tagsComment["#{}".format(tag)]
         except KeyError:
@@ -88,27 +233,25 @@ class MhMarkdownFile:
 
     # expr : re regexp
     def pathMatch(self, path):
-        return str(self.path.resolve()).find(path) != -1
+        return self.resolvedPath.find(path) != -1
 
     # Search tag like #XXXXX ( with tag = '#XXXXX' )
     def hasExactTag(self, tag):
-        result = tag in self.tags
+        result = MhMarkdownFile.TAG_TABLE.find(tag) in self.tagIds
         if result:
             self.matchTag = tag
 
     # Search tag like #XXXXX....  ( with prefix = '#XXXXX' )
     def hasTagStartingBy(self, prefix):
         token = "#{}".format(prefix)
-        for tag in self.tags:
-            if tag.startswith(token):
-                self.matchTag = tag
+        names = MhMarkdownFile.TAG_TABLE.tags
+        for tagId in self.tagIds:
+            if names[tagId].startswith(token):
+                self.matchTag = names[tagId]
                 return True
         return False
 
     def getTagStartingBy(self, prefix):
-        result = []
         token = "#{}".format(prefix)
-        for tag in self.tags:
-            if tag.startswith(token):
-                result.append(tag)
-        return result
+        names = MhMarkdownFile.TAG_TABLE.tags
+        return [names[tagId] for tagId in self.tagIds if names[tagId].startswith(token)]
@@ -0,0 +1,49 @@
+# Copyright 2025 joetjo https://github.com/joetjo/OLA
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+import os.path
+
+
+#
+# Index of the vault by folder: resolved folder path -> keys of the files it contains
+#    Built from the vault files dict ( key -> MhMarkdownFile ), read only once built
+#    Files matching a path condition are computed once per condition
+#
+class MhPathIndex:
+
+    def __init__(self, files):
+        self.files = files
+        self.folders = dict()
+        for key, mdfile in files.items():
+            folder = os.path.dirname(mdfile.resolvedPath)
+            try:
+                self.folders[folder].append(key)
+            except KeyError:
+                self.folders[folder] = [key]
+        self.pathFiles = dict()
+
+    # Keys of the files matching path, same as MhMarkdownFile.pathMatch
+    #    all files of a folder containing path match, other files are checked one by one ( path may include the file name )
+    def filesWithPath(self, path):
+        try:
+            return self.pathFiles[path]
+        except KeyError:
+            pass
+        result = set()
+        for folder, keys in self.folders.items():
+            if path in folder:
+                result.update(keys)
+            else:
+                result.update(key for key in keys if self.files[key].pathMatch(path))
+        self.pathFiles[path] = result
+        return result
@@ -0,0 +1,147 @@
+# Copyright 2025 joetjo https://github.com/joetjo/OLA
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+import json
+import logging
+import os
+import time
+
+
+#
+# Profile of a bloc of a report ( explain mode ): one node per bloc generated, sub blocs in generation order
+#    kind: root, bloc, virtual ( %TAGNAME% ), expanded ( bloc of a virtual bloc for one tag ), else
+#    path: location of the bloc within the setup ( see MhBlocPlan )
+#    time: seconds spent to filter and generate the bloc and its sub blocs ( None if generation failed )
+#
+class MhBlocProfile:
+
+    def __init__(self, title, kind, path):
+        self.title = title
+        self.kind = kind
+        self.path = path
+        self.conditions = None
+        self.input = 0
+        self.matched = 0
+        self.other = 0
+        self.counts = 0
+        self.lines = 0
+        self.time = None
+        self.children = []
+        self.start = time.perf_counter()
+
+    def child(self, title, kind, path):
+        node = MhBlocProfile(title, kind, path)
+        self.children.append(node)
+        return node
+
+    # entry: MhReportEntry generated, lines: lines displayed by the bloc and its sub blocs
+    def finish(self, entry, lines):
+        self.time = time.perf_counter() - self.start
+        if entry.isFiltering:
+            self.conditions = {"tags": list(entry.tags), "paths": list(entry.paths), "multi_condition": entry.multiCondition,
+                               "not": entry.inverseCondition == "not"}
+        self.input = len(entry.inputFiles)
+        self.matched = len(entry.filteredFiles)
+        self.other = len(entry.elseFiles)
+        if entry.plan.count is not None:
+            self.counts = len(entry.plan.count)
+        self.lines = lines
+
+    # Time spent in the bloc itself, sub blocs excluded
+    def selfTime(self):
+        if self.time is None:
+            return 0
+        return max(0, self.time - sum(child.time for child in self.children if child.time is not None))
+
+    def toJson(self):
+        return {"title": self.title, "kind": self.kind, "path": self.path,
+                "time_ms": None if self.time is None else round(self.time * 1000, 3), "self_ms": round(self.selfTime() * 1000, 3),
+                "input": self.input, "matched": self.matched, "else": self.other, "conditions": self.conditions,
+                "counts": self.counts, "lines": self.lines, "blocs": [child.toJson() for child in self.children]}
+
+    # All nodes of the tree with their depth, in generation order
+    def walk(self, depth=0):
+        yield depth, self
+        for child in self.children:
+            yield from child.walk(depth + 1)
+
+
+#
+# Profile of a report generation: root of the tree of bloc profiles
+#    target: target of the report as set up ( relative to the vault )
+#    Saved in the profiles folder: <target>.profile.json ( whole tree ) and <target>.profile.txt ( summary )
+#    never as .md files: a profile must not be parsed as a sheet of the vault
+#
+class MhReportProfile(MhBlocProfile):
+    SLOWEST_COUNT = 5
+
+    def __init__(self, title, target):
+        super().__init__(title, "report", target)
+
+    def close(self, lines):
+        self.time = time.perf_counter() - self.start
+        self.lines = lines
+
+    # Slowest blocs by their own time: list of (path, title, seconds)
+    def slowest(self):
+        nodes = [node for depth, node in self.walk() if node is not self]
+        nodes.sort(key=lambda node: node.selfTime(), reverse=True)
+        return [(node.path, node.title, node.selfTime()) for node in nodes[0:MhReportProfile.SLOWEST_COUNT]]
+
+    def summary(self):
+        lines = ["# Profile of report {}\n".format(self.title),
+                 "Generated in {} ms, {} entries\n".format(round(self.time * 1000, 1), self.lines),
+                 "## Slowest blocs\n",
+                 "|Bloc|Title|Own time (ms)|",
+                 "|----|-----|-------------|"]
+        for path, title, seconds in self.slowest():
+            lines.append("|{}|{}|{}|".format(path, title, round(seconds * 1000, 1)))
+        lines.extend(["\n## Blocs\n",
+                      "|Bloc|Kind|Time (ms)|Input|Matched|Else|Conditions|Lines|",
+                      "|----|----|---------|-----|-------|----|----------|-----|"])
+        for depth, node in self.walk():
+            if node is self:
+                continue
+            conditions = ""
+            if node.conditions is not None:
+                # tags without # ( summary must not look like tags )
+                conditions = " {} ".format(node.conditions["multi_condition"]).join(
+                    ["tag {}".format(tag) for tag in node.conditions["tags"]] + ["path {}".format(path) for path in node.conditions["paths"]])
+                if node.conditions["not"]:
+                    conditions = "not ( {} )".format(conditions)
+            if node.counts > 0:
+                conditions = "{} count: {} rows".format(conditions, node.counts).strip()
+            elapsed = "failed" if node.time is None else round(node.time * 1000, 1)
+            lines.append("|{}{}|{}|{}|{}|{}|{}|{}|{}|".format("&nbsp;&nbsp;" * (depth - 1), node.title or node.path, node.kind, elapsed,
+                                                            node.input, node.matched, node.other, conditions, node.lines))
+        return "\n".join(lines) + "\n"
+
+    # Short html description of the profile ( see MarkdownHelper.generateReportDescription )
+    def description(self):
+        slowest = ", ".join("{} ({} ms)".format(title or path, round(seconds * 1000, 1)) for path, title, seconds in self.slowest())
+        return "Last profiled generation: {} ms, slowest blocs: {}".format(round(self.time * 1000, 1), slowest)
+
+    # folder: profiles folder, created if missing ( sub folders of the target are flattened in the file name )
+    def save(self, folder):
+        name = self.path[0:len(self.path) - 3] if self.path.endswith(".md") else self.path
+        base = os.path.join(folder, name.replace("\\", "_").replace("/", "_"))
+        try:
+            os.makedirs(folder, exist_ok=True)
+            with open("{}.profile.json".format(base), 'w', encoding='utf-8') as writer:
+                json.dump(self.toJson(), writer, indent=1, ensure_ascii=False)
+            with open("{}.profile.txt".format(base), 'w', encoding='utf-8') as writer:
+                writer.write(self.summary())
+        except OSError as e:
+            logging.warning("MDR | Unable to save profile of report \"{}\": {}".format(self.title, e))
+            return
+        logging.info("MDR | Profile of report \"{}\" saved to {}.profile.json ( {} ms )".format(self.title, base, round(self.time * 1000, 1)))
@@ -11,11 +11,16 @@
 #   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 #   See the License for the specific language governing permissions and
 #   limitations under the License.
+import hashlib
 import logging
 
 from base.fileutil import GhFileUtil
+from markdownHelper.bitset import MhFileBits
+from markdownHelper.fileview import MhFileView
 # Ugly but simple
 from markdownHelper.label import MhLabels
+from markdownHelper.profile import MhReportProfile
+from markdownHelper.reportsink import MhReportSink
 
 LONG_BLANK = "                                                                                                         "
 
@@ -38,6 +43,7 @@ ALLOWED_ATTRIBUTES = ["target",  # 1st level only: target file path
                       # the text on the same line will be registered as a comment and shown in report.
                       "showTags",  # ref to tag list to show (tag that start by the requested string will be added to the line)
                       ]
+ALLOWED_KEYS = frozenset(ALLOWED_ATTRIBUTES)
 
 
 class UnknownJSonAttribute(Exception):
@@ -75,6 +81,22 @@ class UnknownContentRef(Exception):
         super().__init__(self.message.format(ref, json))
 
 
+class RecursiveContentRef(Exception):
+    def __init__(self, ref, json,
+                 message="Content reference \"{}\" used within its own content, json bloc:\n{}"):
+        self.message = message
+        super().__init__(self.message.format(ref, json))
+
+
+# Error detected when compiling a report: path is the location of the faulty bloc within the setup
+class InvalidReportSetup(Exception):
+    def __init__(self, path, error,
+                 message="Invalid report setup at {}: {}"):
+        self.message = message
+        self.path = path
+        super().__init__(self.message.format(path, error))
+
+
 class ReferenceUtil:
 
     @staticmethod
@@ -121,45 +143,175 @@ class ReferenceUtil:
         except KeyError:
             return []
 
-class MhEntry:
-    def __init__(self, json, inputFiles, allSubContents):
+#
+# Compiled report bloc: attributes validated and references to shared contents resolved once per generation
+#    Never modified once compiled ( except the memo of expanded virtual blocs ), shared by all reports using it
+#
+class MhBlocPlan:
+
+    # path: location of the bloc within the setup, used to report errors
+    # kind: else or expanded ( see expanded ) for such blocs, set from the bloc otherwise ( root, virtual or bloc )
+    def __init__(self, json, compiler, path, isRoot=False, kind=None):
         self.json = json
-        self.inputFiles = inputFiles
-        self.allSubContents = allSubContents
+        self.path = path
+        try:
+            for key in json:
+                if key not in ALLOWED_KEYS:
+                    raise UnknownJSonAttribute(key, json)
 
-        for key in json:
-            if key not in ALLOWED_ATTRIBUTES:
-                raise UnknownJSonAttribute(key, json)
+            # Setup content filter
+            self.tags = tuple(ReferenceUtil.getTags(json, compiler.allSubContents))
+            self.paths = tuple(ReferenceUtil.getPath(json, compiler.allSubContents))
 
-        # Setup content filter
-        self.tags = ReferenceUtil.getTags(json, allSubContents)
-        self.paths = ReferenceUtil.getPath(self.json, allSubContents)
+            try:
+                self.inverseCondition = json["condition_type"]
+                if self.inverseCondition != "not":
+                    raise UnknownJSonAttribute("condition_type", json,
+                                               message="Invalid value \"{}\" for attribute \"condition_type\""
+                                               .format(self.inverseCondition))
+            except KeyError:
+                self.inverseCondition = []
+
+            try:
+                self.multiCondition = json["multi_condition"]
+                if self.multiCondition != "or" and self.multiCondition != "and":
+                    raise UnknownJSonAttribute("condition_type", json,
+                                               message="Invalid value \"{}\" for attribute \"multi_condition\""
+                                               .format(self.multiCondition))
+            except KeyError:
+                self.multiCondition = "or"
+
+            if isRoot:
+                self.showTags = ReferenceUtil.showTags(json, compiler.allSubContents)
+                self.labels = MhLabels(json)
+        except (UnknownJSonAttribute, UnknownPathRef, UnknownTagRefs, UnknownInfoTafRef) as e:
+            raise InvalidReportSetup(path, e) from e
+
+        try:
+            self.title = json["title"]
+        except KeyError:
+            self.title = ""
+        self.isFiltering = not len(self.tags) == 0 or not len(self.paths) == 0
+        self.isVirtual = self.title == "%TAGNAME%"
+        if kind is None:
+            kind = "root" if isRoot else "virtual" if self.isVirtual else "bloc"
+        self.kind = kind
+        self.compiler = compiler
+
+        # Sub blocs: contents ( own or shared ), count blocs, else bloc
+        if "contents" in json:
+            self.contents = compiler.compileBlocs(json["contents"], "{}/contents".format(path))
+        elif "content_ref" in json:
+            self.contents = compiler.sharedContent(json["content_ref"], json, path)
+        else:
+            self.contents = None
+        if self.contents is None and "count" in json:
+            self.count = tuple((key, MhBlocPlan(value, compiler, "{}/count/{}".format(path, key)))
+                               for key, value in json["count"].items())
+        else:
+            self.count = None
+        if "else" in json:
+            self.elsePlan = MhBlocPlan(json["else"], compiler, "{}/else".format(path), kind="else")
+        else:
+            self.elsePlan = None
+        self.expandedPlans = dict()
+
+    # Bloc processing the files not selected ( KeyError if none, as the json attribute it replaces )
+    def elseBloc(self):
+        if self.elsePlan is None:
+            raise KeyError("else")
+        return self.elsePlan
 
+    # Virtual bloc ( %TAGNAME% ) expanded for tag: same bloc without else, titled and filtered by tag
+    def expanded(self, tag):
         try:
-            self.inverseCondition = self.json["condition_type"]
-            if self.inverseCondition != "not":
-                raise UnknownJSonAttribute("condition_type", json,
-                                           message="Invalid value \"{}\" for attribute \"condition_type\""
-                                           .format(self.inverseCondition))
+            return self.expandedPlans[tag]
         except KeyError:
-            self.inverseCondition = []
+            content = self.json.copy()
+            del content["else"]
+            content["title"] = GhFileUtil.ConvertUpperCaseWordSeparatedNameToStr(tag[len(self.tags[0]) + 1:])  # Replace %TAGNAME% title by expended tag detected
+            content["tag_condition"] = [tag[1:]]  # and use the expanded tag to filer
+            plan = MhBlocPlan(content, self.compiler, "{}[{}]".format(self.path, tag), kind="expanded")
+            self.expandedPlans[tag] = plan
+            return plan
+
+
+#
+# Compile reports of the setup into MhBlocPlan, shared contents are compiled once for all reports
+#
+class MhPlanCompiler:
+
+    def __init__(self, allSubContents):
+        self.allSubContents = allSubContents
+        self.sharedPlans = dict()
+        self.compiling = set()  # shared contents being compiled ( recursive reference detection )
 
+    def compileReport(self, name, json):
+        return MhBlocPlan(json, self, "reports/{}".format(name), isRoot=True)
+
+    def compileBlocs(self, blocs, path):
+        return tuple(MhBlocPlan(bloc, self, "{}[{}]".format(path, pos)) for pos, bloc in enumerate(blocs))
+
+    # json, path: bloc using the shared content
+    def sharedContent(self, ref, json, path):
         try:
-            self.multiCondition = self.json["multi_condition"]
-            if self.multiCondition != "or" and self.multiCondition != "and":
-                raise UnknownJSonAttribute("condition_type", json,
-                                           message="Invalid value \"{}\" for attribute \"multi_condition\""
-                                           .format(self.multiCondition))
+            return self.sharedPlans[ref]
         except KeyError:
-            self.multiCondition = "or"
+            pass
+        if ref in self.compiling:
+            raise InvalidReportSetup(path, RecursiveContentRef(ref, json))
+        try:
+            blocs = self.allSubContents[ref]
+        except KeyError as e:
+            raise InvalidReportSetup(path, UnknownContentRef(ref, json)) from e
+        self.compiling.add(ref)
+        try:
+            self.sharedPlans[ref] = self.compileBlocs(blocs, "shared_contents/{}".format(ref))
+        finally:
+            self.compiling.discard(ref)
+        return self.sharedPlans[ref]
+
+
+class MhEntry:
+    # plan: MhBlocPlan of the bloc
+    # tagIndex: MhTagIndex of the vault, if set tag conditions are resolved from it instead of each file tags
+    # cache: MhConditionCache of the generation run, if set condition results are shared with other blocs
+    # pathIndex: MhPathIndex of the vault, if set path conditions are resolved from it instead of each file path
+    def __init__(self, plan, inputFiles, tagIndex=None, cache=None, pathIndex=None):
+        self.plan = plan
+        self.json = plan.json
+        self.inputFiles = inputFiles
+        self.tagIndex = tagIndex
+        self.pathIndex = pathIndex
+        self.cache = cache
+
+        # Setup content filter
+        self.tags = plan.tags
+        self.paths = plan.paths
+        self.inverseCondition = plan.inverseCondition
+        self.multiCondition = plan.multiCondition
+
+        # For each tag / path condition, keys of the files matching it ( set on evaluation )
+        self.tagFiles = None
+        self.pathFiles = None
+
+    def hasTag(self, name, file, tagPos):
+        if self.tagFiles is not None:
+            return name in self.tagFiles[tagPos]
+        return file.hasTagStartingBy(self.tags[tagPos])
+
+    def hasPath(self, name, file, pathPos):
+        if self.pathFiles is not None:
+            return name in self.pathFiles[pathPos]
+        return file.pathMatch(self.paths[pathPos])
 
     # Returns True if file match report condition
-    def matchCondition(self, file):
+    def matchCondition(self, name, file):
         result = self.multiCondition == "and"  # if or, false by default and became True on first match found
         # if and, true by default and became False on 1st unmatch
 
-        for tag in self.tags:
-            if file.hasTagStartingBy(tag):
+        for tagPos in range(len(self.tags)):
+            if self.hasTag(name, file, tagPos):
                 if self.multiCondition != "and":
                     result = True
                     break
@@ -167,8 +319,8 @@ class MhEntry:
                 result = False
                 break
 
-        for path in self.paths:
-            if file.pathMatch(path):
+        for pathPos in range(len(self.paths)):
+            if self.hasPath(name, file, pathPos):
                 if self.multiCondition != "and":
                     result = True
                     break
@@ -178,38 +330,114 @@ class MhEntry:
 
         return result
 
+    # Bitmap of the files matching report condition ( bitset engine )
+    def conditionBits(self, index):
+        if self.multiCondition == "and":
+            result = index.all
+            for tag in self.tags:
+                result = result & index.tagBits(tag)
+            for path in self.paths:
+                result = result & index.pathBits(path)
+        else:
+            result = 0
+            for tag in self.tags:
+                result = result | index.tagBits(tag)
+            for path in self.paths:
+                result = result | index.pathBits(path)
+        return result
 
-class MhCountEntry(MhEntry):
+    # Returns files of inputFiles matching the condition and the others
+    def splitFiles(self):
+        if self.cache is not None:
+            return self.cache.split(self)
+        return self.evaluate()
+
+    def evaluate(self):
+        if isinstance(self.inputFiles, MhFileBits):
+            return self.inputFiles.split(self.conditionBits(self.inputFiles.index))
+        if self.tagIndex is not None:
+            self.tagFiles = [self.tagIndex.filesWithTagStartingBy(tag) for tag in self.tags]
+        if self.pathIndex is not None:
+            self.pathFiles = [self.pathIndex.filesWithPath(path) for path in self.paths]
+        if isinstance(self.inputFiles, MhFileView):
+            return self.inputFiles.split(self.matchCondition)
+        matching = dict()
+        others = dict()
+        for name, file in self.inputFiles.items():
+            if self.matchCondition(name, file):
+                matching[name] = file
+            else:
+                others[name] = file
+        return matching, others
 
-    def __init__(self, json, inputFiles, allSubContents):
 
-        super().__init__(json, inputFiles, allSubContents)
-        self.count = 0
+class MhCountEntry(MhEntry):
 
-        for name, file in self.inputFiles.items():
-            if self.matchCondition(file):
-                self.count = self.count + 1
+    # inputKeys: keys of inputFiles, shared by the count entries of a bloc ( see keysOf ), if set the files matching
+    #    the condition are counted from the tag and path indexes instead of filtering inputFiles
+    def __init__(self, plan, inputFiles, tagIndex=None, cache=None, pathIndex=None, inputKeys=None):
+
+        super().__init__(plan, inputFiles, tagIndex, cache, pathIndex)
+        self.inputKeys = inputKeys
+        if isinstance(inputFiles, MhFileBits):
+            self.count = bin(inputFiles.bits & self.conditionBits(inputFiles.index)).count("1")
+        elif inputKeys is not None and tagIndex is not None and pathIndex is not None:
+            self.count = len(self.conditionKeys())
+        else:
+            self.count = len(self.splitFiles()[0])
+
+    # Keys of inputFiles matching the condition ( same as matchCondition )
+    def conditionKeys(self):
+        conditions = [self.tagIndex.filesWithTagStartingBy(tag) for tag in self.tags]
+        conditions.extend(self.pathIndex.filesWithPath(path) for path in self.paths)
+        if self.multiCondition == "and":
+            result = self.inputKeys
+            for keys in conditions:
+                result = result.intersection(keys)
+            return result
+        if len(conditions) == 0:
+            return set()  # or: no file matches without condition
+        if len(conditions) == 1:
+            return self.inputKeys.intersection(conditions[0])
+        return self.inputKeys.intersection(set().union(*conditions))
 
     def getCount(self):
         return self.count
 
+    # Keys of files to share between the count entries of a bloc ( None if not used, see __init__ )
+    @staticmethod
+    def keysOf(files, tagIndex, pathIndex):
+        if isinstance(files, MhFileBits) or tagIndex is None or pathIndex is None:
+            return None
+        if isinstance(files, MhFileView):
+            return {files.keys[pos] for pos in files.positions}
+        return set(files.keys())
+
 
 class MhReportEntry(MhEntry):
 
     # inputFiles: dict of name, MhMarkdownFiles
-    def __init__(self, json, inputFiles, allTags, allSubContents, commentTag, showTags, parentTitle, labels=None, level="#", isRoot=False):
-        super().__init__(json, inputFiles, allSubContents)
+    # listed: if set, names of the files listed by the report are added to it
+    # selected: files of inputFiles matching the condition when already known ( expanded virtual bloc, without else )
+    # profile: MhBlocProfile of the parent bloc in explain mode, a profile of this bloc is added to it
+    def __init__(self, plan, inputFiles, allTags, commentTag, showTags, parentTitle, labels=None, level="#", isRoot=False,
+                 tagIndex=None, listed=None, cache=None, pathIndex=None, selected=None, profile=None):
+        if profile is not None:
+            profile = profile.child(plan.title, plan.kind, plan.path)
+        self.profile = profile
+        super().__init__(plan, inputFiles, tagIndex, cache, pathIndex)
+        self.listed = listed
         self.level = level
         self.allTags = allTags
         self.commentTag = commentTag
         self.showTags = showTags
         if labels is None:
-            self.labels = MhLabels(json)
+            self.labels = plan.labels
         else:
             self.labels = labels
 
-        self.isFiltering = not len(self.tags) == 0 or not len(self.paths) == 0
-        self.isVirtual = self.title() == "%TAGNAME%"
+        self.isFiltering = plan.isFiltering
+        self.isVirtual = plan.isVirtual
         self.isRoot = isRoot
         if self.isRoot:
             self.paragraphTitle = ""
@@ -225,13 +453,10 @@ class MhReportEntry(MhEntry):
         self.elseFiles = dict()
         if not self.isFiltering:
             self.filteredFiles = inputFiles.copy()
+        elif selected is not None:
+            self.filteredFiles = selected
         else:
-            self.filteredFiles = dict()
-            for name, file in self.inputFiles.items():
-                if self.matchCondition(file):
-                    self.filteredFiles[name] = file
-                else:
-                    self.elseFiles[name] = file
+            self.filteredFiles, self.elseFiles = self.splitFiles()
 
         if self.inverseCondition == "not":
             tmp = self.filteredFiles
@@ -241,59 +466,80 @@ class MhReportEntry(MhEntry):
         self.lineGenerated = 0
 
     def title(self):
-        try:
-            return self.json["title"]
-        except KeyError:
-            return ""
+        return self.plan.title
 
+    # Tags of the vault starting by one of tags ( %TAGNAME% expansion ), read from the sorted tags of tagIndex if set
     @staticmethod
-    def mappingTags(tags, allTags):
+    def mappingTags(tags, allTags, tagIndex=None):
         result = []
         for token in tags:
+            if tagIndex is not None:
+                result.extend(tag for tag in tagIndex.tagsStartingBy(token) if not tag.endswith("/"))
+                continue
             token = "#{}".format(token)
             for tag in allTags:
                 if tag.startswith(token) and not tag.endswith("/"):
                     result.append(tag)
         return result
 
+    # Files of filteredFiles having each expanded tag ( like #TAG... ), in a single pass on filteredFiles
+    #    Returns dict tag -> files, None if files of expanded blocs must be filtered one bloc at a time
+    #    ( no tag index, bitset engine or expanded condition not limited to the tag )
+    def expandedFiles(self, tags):
+        files = self.filteredFiles
+        if self.tagIndex is None or isinstance(files, MhFileBits) or len(self.paths) > 0 or self.inverseCondition == "not":
+            return None
+        if isinstance(files, MhFileView):
+            positions = {files.keys[pos]: pos for pos in files.positions}
+        else:
+            keys = list(files.keys())
+            positions = {key: pos for pos, key in enumerate(keys)}
+        result = dict()
+        for tag in tags:
+            selected = sorted(positions[key] for key in self.tagIndex.filesWithTagStartingBy(tag[1:]) if key in positions)
+            if isinstance(files, MhFileView):
+                result[tag] = files.subset(selected)
+            else:
+                result[tag] = {keys[pos]: files[keys[pos]] for pos in selected}
+        return result
+
     def getContents(self):
-        try:
-            return self.json["contents"]
-        except KeyError:
-            try:
-                ref = self.json["content_ref"]
-                try:
-                    return self.allSubContents[ref]
-                except KeyError:
-                    raise UnknownContentRef(ref, self.json)
-            except KeyError:
-                return None
+        return self.plan.contents
 
     def getCount(self):
-        try:
-            return self.json["count"]
-        except KeyError:
-            return None
+        return self.plan.count
 
+    # Returns the count of lines displayed by the bloc and its sub blocs
     def generate(self, writer):
+        lines = self.generateBloc(writer)
+        if self.profile is not None:
+            self.profile.finish(self, lines)
+        return lines
+
+    def generateBloc(self, writer):
         if self.isVirtual:
             logging.debug("MDR |  | {} VIRTUAL [{}->{}] ({} {})".format(LONG_BLANK[0:len(self.level) * 2],
                                                                         len(self.inputFiles), len(self.filteredFiles), self.tags,
                                                                         self.paths))
             if len(self.filteredFiles) > 0:
                 # virtual content that must be expanded !
-                for tag in sorted(self.mappingTags(self.tags, self.allTags)):
-                    content = self.json.copy()
-                    del content["else"]
-                    content["title"] = GhFileUtil.ConvertUpperCaseWordSeparatedNameToStr(tag[len(self.tags[0]) + 1:])  # Replace %TAGNAME% title by expended tag detected
-                    content["tag_condition"] = [tag[1:]]  # and use the expanded tag to filer
-                    if len(content["title"]) > 0:
+                tags = sorted(self.mappingTags(self.tags, self.allTags, self.tagIndex))
+                expandedFiles = None
+                for tag in tags:
+                    content = self.plan.expanded(tag)
+                    if len(content.title) > 0:
+                        if expandedFiles is None:
+                            expandedFiles = self.expandedFiles(tags) or dict()
                         self.lineGenerated = self.lineGenerated + MhReportEntry(content, self.filteredFiles.copy(), self.allTags,
-                                      self.allSubContents, self.commentTag, self.showTags, self.paragraphTitle, self.labels, self.level).generate(writer)
+                                      self.commentTag, self.showTags, self.paragraphTitle, self.labels, self.level,
+                                      tagIndex=self.tagIndex, pathIndex=self.pathIndex, listed=self.listed,
+                                      cache=self.cache, selected=expandedFiles.get(tag), profile=self.profile).generate(writer)
             # Proceed to else of VIRTUAL block
             try:
-                self.lineGenerated = self.lineGenerated + MhReportEntry(self.json["else"], self.elseFiles, self.allTags,
-                              self.allSubContents, self.commentTag, self.showTags, self.paragraphTitle, self.labels, self.level).generate(writer)
+                self.lineGenerated = self.lineGenerated + MhReportEntry(self.plan.elseBloc(), self.elseFiles, self.allTags,
+                              self.commentTag, self.showTags, self.paragraphTitle, self.labels, self.level,
+                              tagIndex=self.tagIndex, pathIndex=self.pathIndex, listed=self.listed,
+                              cache=self.cache, profile=self.profile).generate(writer)
             except KeyError:
                 pass
 
@@ -314,19 +560,26 @@ class MhReportEntry(MhEntry):
             if json_contents is not None:
                 files = self.filteredFiles
                 for content in json_contents:
-                    cr = MhReportEntry(content, files, self.allTags, self.allSubContents,
-                                       self.commentTag, self.showTags, self.paragraphTitle, self.labels, nextLevel)
+                    cr = MhReportEntry(content, files, self.allTags,
+                                       self.commentTag, self.showTags, self.paragraphTitle, self.labels, nextLevel,
+                                       tagIndex=self.tagIndex, pathIndex=self.pathIndex, listed=self.listed,
+                                       cache=self.cache, profile=self.profile)
                     self.lineGenerated = self.lineGenerated + cr.generate(writer)
                     files = cr.elseFiles
             else:
                 json_count = self.getCount()
                 if json_count is not None:
-                    writer.writelines("|What|Count|\n|-|-|")
-                    for key, value in json_count.items():
-                        writer.writelines("\n| {} | {} |".format(key, MhCountEntry(value, self.filteredFiles, self.allSubContents).getCount()))
+                    writer.write("|What|Count|\n|-|-|")
+                    # Files are listed once for all count entries
+                    inputKeys = MhCountEntry.keysOf(self.filteredFiles, self.tagIndex, self.pathIndex)
+                    for key, value in json_count:
+                        writer.write("\n| {} | {} |".format(key, MhCountEntry(value, self.filteredFiles, self.tagIndex, self.cache, self.pathIndex,
+                                                                                inputKeys).getCount()))
                         self.lineGenerated = self.lineGenerated + 1
                 else:
                     for name, file in self.filteredFiles.items():
+                        if self.listed is not None:
+                            self.listed.add(name)
                         comment = ""
                         if self.commentTag is not None:
                             comments = file.getTagComment(self.commentTag)
@@ -345,33 +598,41 @@ class MhReportEntry(MhEntry):
                         #                    writer.writelines("- [[{}]] {} {} \n".format(name, ctags, comment))
                         if self.commentTag is not None and titleToGenerate:
                             nextLevel = "{}#".format(self.level)
-                            writer.writelines(currentTitle)
-                            writer.writelines("|{}|{}|{}|\n".format(self.labels.about, self.labels.tags, self.labels.comment))
-                            writer.writelines("|----|----|-------|\n")
+                            writer.write(currentTitle)
+                            writer.write("|{}|{}|{}|\n".format(self.labels.about, self.labels.tags, self.labels.comment))
+                            writer.write("|----|----|-------|\n")
                             titleToGenerate = False
                         if self.commentTag is not None:
-                            writer.writelines("| [[{}]] | {} | {} |\n".format(name, ctags, comment))
+                            writer.write("| [[{}]] | {} | {} |\n".format(name, ctags, comment))
                         else:
-                            writer.writelines("[[{}]]  {} \n".format(name, ctags))
+                            writer.write("[[{}]]  {} \n".format(name, ctags))
                         self.lineGenerated = self.lineGenerated + 1
 
         if len(self.elseFiles) > 0:
             try:
-                self.lineGenerated = self.lineGenerated + MhReportEntry(self.json["else"], self.elseFiles, self.allTags,
-                              self.allSubContents, self.commentTag, self.showTags, "",
-                              self.labels, nextLevel).generate(writer)
+                self.lineGenerated = self.lineGenerated + MhReportEntry(self.plan.elseBloc(), self.elseFiles, self.allTags,
+                              self.commentTag, self.showTags, "",
+                              self.labels, nextLevel, tagIndex=self.tagIndex, pathIndex=self.pathIndex, listed=self.listed,
+                              cache=self.cache, profile=self.profile).generate(writer)
             except KeyError:
                 pass
         return self.lineGenerated
 
 class MhReport:
 
-    def __init__(self, json, baseFolder, inputFiles, allTags, allSubContents, allReportsData):
-        self.json = json
+    # plan: MhBlocPlan of the report ( see MhPlanCompiler.compileReport )
+    # cache: MhConditionCache shared by the reports of a generation run ( optional )
+    # profile: True to record the profile of each bloc ( explain mode ), closed by generate
+    def __init__(self, plan, baseFolder, inputFiles, allTags, allReportsData, tagIndex=None, cache=None, pathIndex=None,
+                 profile=False):
+        self.plan = plan
+        self.json = plan.json
+        self.tagIndex = tagIndex
+        self.pathIndex = pathIndex
+        self.cache = cache
         self.baseFolder = baseFolder
         self.inputFiles = inputFiles
         self.allTags = allTags
-        self.allSubContents = allSubContents
         self.allReportsData = allReportsData
 
         # Setup comment tag
@@ -381,32 +642,92 @@ class MhReport:
             self.commentTag = None
 
         # Setup show tags
-        self.showTags = ReferenceUtil.showTags(self.json, allSubContents)
+        self.showTags = plan.showTags
+        self.rootReport = None
+        # Set by generate: hash of the report content and True if the target has been written
+        self.contentHash = None
+        self.written = False
+        # Names of the files listed by the report, filled by generate
+        self.listedFiles = set()
+        self.profile = MhReportProfile(self.json["title"], self.json["target"]) if profile else None
 
     def target(self):
         return self.baseFolder + '/' + self.json["target"]
 
-    def generate(self):
-        rootReport = MhReportEntry(self.json, self.inputFiles, self.allTags, self.allSubContents,
-                                   self.commentTag, self.showTags, "", isRoot=True)
+    def root(self):
+        if self.rootReport is None:
+            self.rootReport = MhReportEntry(self.plan, self.inputFiles, self.allTags,
+                                            self.commentTag, self.showTags, "", isRoot=True, tagIndex=self.tagIndex,
+                                            pathIndex=self.pathIndex, listed=self.listedFiles, cache=self.cache,
+                                            profile=self.profile)
+        return self.rootReport
+
+    # Files the report content depends on: files selected by the root bloc ( and by its else bloc if any )
+    #    Returns (key, MhMarkdownFile)
+    def sourceFiles(self):
+        rootReport = self.root()
+        yield from rootReport.filteredFiles.items()
+        if "else" in self.json:
+            yield from rootReport.elseFiles.items()
+
+    # Hash of the content of the target file ( None if not readable )
+    def targetHash(self):
+        try:
+            with open(self.target(), 'r', encoding='utf-8') as reader:
+                return hashlib.sha1(reader.read().encode('utf-8')).hexdigest()
+        except (OSError, UnicodeDecodeError):
+            return None
+
+    # Report is rendered into sink ( see MhReportSink ), target is written ( replaced ) only if its content changes
+    #    knownHash: hash of the current content of the target if known, target is read otherwise
+    #    sink: MhReportSink or MhStreamingSink on the target ( default: content collected in memory )
+    def generate(self, knownHash=None, sink=None):
+        if sink is None:
+            sink = MhReportSink(self.target())
         logging.info("MDR | Generate report \"{}\" to {}".format(self.json["title"], self.target()))
-        with open(self.target(), 'w', encoding='utf-8') as writer:
-            writer.writelines(
-                "> *Markdown generated report by [joetjo](https://github.com/joetjo/OLA) - do not edit* - report explanation available after the report\n\n")
-            try:
-                about = self.json["about"]
-                writer.writelines("*CONTENT*\n```")
-                writer.writelines(about)
-                writer.writelines("```\n")
-            except KeyError:
-                pass  # no about set
-            lineDisplayedCount = rootReport.generate(writer)
-            writer.writelines("\n")
-            writer.writelines("----\n")
-            writer.writelines("# Entries: {} - Report explanation\n".format(lineDisplayedCount))
-            try:
-                writer.writelines("\n---\n{}\n\n---".format(self.allReportsData[self.json["group"]][self.json["target"]]["description"].replace("&nbsp;"," ")))
-            except TypeError or KeyError:
-                writer.writelines("\n---\ngenerated only when all reports are generated\n\n---")
-                pass
+        try:
+            lineDisplayedCount = self.render(sink)
+            self.contentHash = sink.contentHash()
+        except Exception:
+            sink.discard()
+            raise
+        if self.profile is not None:
+            self.profile.close(lineDisplayedCount)
+        if knownHash is None:
+            knownHash = self.targetHash()
+        self.written = knownHash != self.contentHash
+        if self.written:
+            sink.commit()
+        else:
+            sink.discard()
+            logging.info("MDR | Report \"{}\" content unchanged, {} not written".format(self.json["title"], self.target()))
+        return lineDisplayedCount
+
+    # Content of the report as it would be generated, target is not written
+    def preview(self):
+        sink = MhReportSink()
+        self.render(sink)
+        return sink.getvalue()
+
+    # Write the report content to writer ( MhReportSink )
+    #    Returns the count of lines displayed
+    def render(self, writer):
+        writer.write(
+            "> *Markdown generated report by [joetjo](https://github.com/joetjo/OLA) - do not edit* - report explanation available after the report\n\n")
+        try:
+            about = self.json["about"]
+            writer.write("*CONTENT*\n```")
+            writer.write(about)
+            writer.write("```\n")
+        except KeyError:
+            pass  # no about set
+        lineDisplayedCount = self.root().generate(writer)
+        writer.write("\n")
+        writer.write("----\n")
+        writer.write("# Entries: {} - Report explanation\n".format(lineDisplayedCount))
+        try:
+            writer.write("\n---\n{}\n\n---".format(self.allReportsData[self.json["group"]][self.json["target"]]["description"].replace("&nbsp;"," ")))
+        except TypeError or KeyError:
+            writer.write("\n---\ngenerated only when all reports are generated\n\n---")
+            pass
         return lineDisplayedCount
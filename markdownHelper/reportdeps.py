@@ -0,0 +1,136 @@
+# Copyright 2025 joetjo https://github.com/joetjo/OLA
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+import hashlib
+import json
+import logging
+import os
+
+from base.persistentList import GhPersistentList
+
+
+#
+# Persistent record of the last run of each report, used to skip reports whose result would be unchanged
+#    key: report target, entry: {"config": digest of the report setup,
+#                                "selection": digest of the files selected by the report root bloc and of their tags
+#                                             used as condition by the report,
+#                                "files": key -> mtime of the files listed by the report ( their comments are displayed ),
+#                                "count": lines displayed, "hash": hash of the report content,
+#                                "mtime": mtime of the target once processed}
+#    A file edit that changes neither a condition tag nor a listed file does not change the report
+#
+class MhReportDeps(GhPersistentList):
+    VERSION = 1
+    # Shared contents referenced by report blocs: attribute -> shared contents group ( None: shared contents root )
+    REFS = {"content_ref": None, "tag_refs": "tags", "path_ref": "paths", "showTags": "info_tags"}
+
+    def __init__(self, path):
+        self.written = 0
+        self.unchanged = 0
+        try:
+            super().__init__(path)
+        except ValueError:  # corrupted file: all reports are generated
+            logging.warning("MDR | Reports dependencies {} unreadable, all reports will be generated".format(path))
+            self.values = dict()
+        if self.values.get("version") != MhReportDeps.VERSION:
+            self.values = {"version": MhReportDeps.VERSION, "reports": dict()}
+        self.reports = self.values["reports"]
+
+    def lookup(self, target):
+        return self.reports.get(target)
+
+    def store(self, target, run, written):
+        self.reports[target] = run
+        if written:
+            self.written = self.written + 1
+        else:
+            self.unchanged = self.unchanged + 1
+
+    def save(self):
+        logging.info("MDR | Reports: {} written, {} unchanged".format(self.written, self.unchanged))
+        super().save()
+        self.written = 0
+        self.unchanged = 0
+
+    # Returns the digest of the report setup, including the shared contents it references,
+    #    and the tags ( with # ) used as condition by the report: other tags of a file cannot change the report
+    @staticmethod
+    def analyse(report, allSubContents):
+        refs = dict()
+        tags = set()
+        MhReportDeps.collectRefs(report, allSubContents, refs, tags)
+        data = json.dumps([MhReportDeps.VERSION, report, refs], sort_keys=True, default=str)
+        return hashlib.sha1(data.encode('utf-8')).hexdigest(), tuple(sorted("#{}".format(tag) for tag in tags))
+
+    @staticmethod
+    def collectRefs(bloc, allSubContents, refs, tags):
+        if isinstance(bloc, list):
+            for item in bloc:
+                MhReportDeps.collectRefs(item, allSubContents, refs, tags)
+            return
+        if not isinstance(bloc, dict):
+            return
+        for name, value in bloc.items():
+            if name == "tag_condition":
+                tags.update(value if isinstance(value, list) else [value])
+            elif name in MhReportDeps.REFS:
+                group = MhReportDeps.REFS[name]
+                for ref in value if isinstance(value, list) else [value]:
+                    refKey = "{}/{}".format(group, ref)
+                    if refKey in refs:
+                        continue
+                    try:
+                        refs[refKey] = allSubContents[ref] if group is None else allSubContents[group][ref]
+                    except (KeyError, TypeError):
+                        refs[refKey] = None  # unknown reference, reported by report generation
+                        continue
+                    if group is None:
+                        MhReportDeps.collectRefs(refs[refKey], allSubContents, refs, tags)
+                    elif group == "tags":
+                        tags.update(refs[refKey])
+            else:
+                MhReportDeps.collectRefs(value, allSubContents, refs, tags)
+
+    # Digest of the files selected, of their path and of their tags starting by one of conditionTags
+    #    files: (key, MhMarkdownFile) in key order
+    @staticmethod
+    def selectionDigest(files, conditionTags):
+        digest = hashlib.sha1()
+        for key, mdfile in files:
+            tags = "\0".join(tag for tag in mdfile.tags if tag.startswith(conditionTags))
+            digest.update("{}\0{}\0{}\n".format(key, mdfile.localPath, tags).encode('utf-8'))
+        return digest.hexdigest()
+
+    # True if the report written by lastRun is still the one run would write
+    #    files: dict key -> MhMarkdownFile of the vault
+    @staticmethod
+    def isUnchanged(lastRun, run, files, target):
+        if lastRun is None or lastRun.get("config") != run["config"] or lastRun.get("selection") != run["selection"]:
+            return False
+        try:
+            for key, mtime in lastRun["files"].items():
+                if files[key].lastModif != mtime:
+                    return False
+            return os.path.getmtime(target) == lastRun["mtime"]
+        except (KeyError, OSError):  # report file removed or modified
+            return False
+
+    # Hash of the content of the target as written by lastRun, None if the target may have been modified since
+    @staticmethod
+    def targetHash(lastRun, target):
+        try:
+            if os.path.getmtime(target) == lastRun["mtime"]:
+                return lastRun["hash"]
+        except (TypeError, KeyError, OSError):
+            pass
+        return None
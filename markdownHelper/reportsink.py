@@ -0,0 +1,102 @@
+# Copyright 2025 joetjo https://github.com/joetjo/OLA
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+import hashlib
+import os
+
+
+#
+# Output of a report generation: content is collected in memory and written to the target with a single write
+#    target: path of the report file ( None: content only previewed, see getvalue )
+#    Target is replaced once fully written ( through target.tmp ), and only when requested ( see commit )
+#
+class MhReportSink:
+
+    def __init__(self, target=None):
+        self.target = target
+        self.parts = []
+
+    def write(self, text):
+        self.parts.append(text)
+
+    # Content generated so far
+    def getvalue(self):
+        return "".join(self.parts)
+
+    # Hash of the whole content, generation must be finished
+    def contentHash(self):
+        return hashlib.sha1(self.getvalue().encode('utf-8')).hexdigest()
+
+    # Replace the target by the content generated
+    def commit(self):
+        tmp = "{}.tmp".format(self.target)
+        with open(tmp, 'w', encoding='utf-8') as writer:
+            writer.write(self.getvalue())
+        os.replace(tmp, self.target)
+
+    # Content generated is dropped, target is left untouched
+    def discard(self):
+        self.parts = []
+
+
+#
+# Output of a large report: content is written to target.tmp each time flushSize characters are collected
+#    Memory used does not depend on report size, target is replaced only on commit as for MhReportSink
+#    getvalue returns only the content not flushed yet
+#
+class MhStreamingSink(MhReportSink):
+
+    def __init__(self, target, flushSize):
+        super().__init__(target)
+        self.flushSize = flushSize
+        self.size = 0
+        self.digest = hashlib.sha1()
+        self.tmp = "{}.tmp".format(target)
+        self.writer = None
+
+    def write(self, text):
+        self.parts.append(text)
+        self.size = self.size + len(text)
+        if self.size >= self.flushSize:
+            self.flush()
+
+    def flush(self):
+        if self.writer is None:
+            self.writer = open(self.tmp, 'w', encoding='utf-8')
+        content = "".join(self.parts)
+        self.digest.update(content.encode('utf-8'))
+        self.writer.write(content)
+        self.parts = []
+        self.size = 0
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+    def contentHash(self):
+        if self.writer is None or not self.writer.closed:
+            self.close()
+        return self.digest.hexdigest()
+
+    def commit(self):
+        self.contentHash()
+        os.replace(self.tmp, self.target)
+
+    def discard(self):
+        self.parts = []
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                os.remove(self.tmp)
+            except OSError:
+                pass
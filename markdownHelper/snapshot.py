@@ -0,0 +1,156 @@
+# Copyright 2025 joetjo https://github.com/joetjo/OLA
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+import json
+import logging
+import os
+import struct
+from array import array
+
+from markdownHelper.bitset import MhBitsetIndex
+from markdownHelper.fileview import MhFileView
+from markdownHelper.markdownfile import MhMarkdownFile
+from markdownHelper.pathindex import MhPathIndex
+
+
+#
+# Parsed vault content used by reports: never modified once built, a new one is built after each parsing or update
+#    generation: incremented on each new snapshot ( 0: vault not parsed yet )
+#    files: dict key -> MhMarkdownFile sorted by key
+#    tags: dict of all tags
+#    tagIndex: MhTagIndex of files
+#    folders: dict folder path -> mtime when parsed
+#    parsedFiles: dict key -> MhMarkdownFile in parsing order ( saved order )
+#
+class MhVaultSnapshot:
+    # Binary file: header ( MAGIC, FORMAT_VERSION ) followed by the content as utf-8 json ( data only, checked when read )
+    MAGIC = b"OLAVAULT"
+    FORMAT_VERSION = 3
+    HEADER = struct.Struct(">8sI")
+
+    def __init__(self, generation, files, tags, tagIndex, folders, parsedFiles):
+        self.generation = generation
+        self.files = files
+        self.tags = tags
+        self.tagIndex = tagIndex
+        self.folders = folders
+        self.parsedFiles = parsedFiles
+        self.bitsetIndex = None
+        self.folderIndex = None
+        self.view = None
+
+    # All files as a view shared by reports ( files report engine )
+    def fileView(self):
+        if self.view is None:
+            self.view = MhFileView(tuple(self.files.keys()), tuple(self.files.values()))
+        return self.view
+
+    # Index of files by folder used by path conditions, built on first use
+    def pathIndex(self):
+        if self.folderIndex is None:
+            self.folderIndex = MhPathIndex(self.files)
+        return self.folderIndex
+
+    # Index used by the bitset report engine, built on first use
+    def bitset(self):
+        if self.bitsetIndex is None:
+            self.bitsetIndex = MhBitsetIndex(self.files, self.tagIndex, self.pathIndex())
+        return self.bitsetIndex
+
+    # True if vault may have changed since this snapshot was built:
+    #    a folder content changed ( file created, removed or renamed ) or a markdown file has been modified
+    def isStale(self):
+        if self.generation == 0:
+            return True
+        try:
+            for folder, mtime in self.folders.items():
+                if os.stat(folder).st_mtime != mtime:
+                    logging.info("MDR | Vault snapshot {} is stale: {} changed".format(self.generation, folder))
+                    return True
+            for mdfile in self.files.values():
+                stat = os.stat(mdfile.path)
+                if stat.st_mtime != mdfile.lastModif or stat.st_size != mdfile.size:
+                    logging.info("MDR | Vault snapshot {} is stale: {} modified".format(self.generation, mdfile.localPath))
+                    return True
+        except OSError as e:
+            logging.info("MDR | Vault snapshot {} is stale: {}".format(self.generation, e))
+            return True
+        return False
+
+    # Write the snapshot to path ( replaced only once fully written )
+    def save(self, path, vault):
+        data = {"vault": vault,
+                "folders": self.folders,
+                "tags": list(MhMarkdownFile.TAG_TABLE.tags),
+                "files": [(key, str(mdfile.path), mdfile.resolvedPath, mdfile.lastModif, mdfile.size, mdfile.tagIds.tolist(), mdfile.long,
+                           mdfile.tagsComment)
+                          for key, mdfile in self.parsedFiles.items()]}
+        tmpPath = "{}.tmp".format(path)
+        with open(tmpPath, "wb") as writer:
+            writer.write(MhVaultSnapshot.HEADER.pack(MhVaultSnapshot.MAGIC, MhVaultSnapshot.FORMAT_VERSION))
+            writer.write(json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+        os.replace(tmpPath, path)
+        logging.info("MDR | Vault snapshot {} saved to {} ({} files)".format(self.generation, path, len(self.files)))
+
+    # Returns content written by save for this vault, None if the file is missing, unreadable, invalid or from another version
+    #    {"folders": dict folder -> mtime, "files": list of (key, path, resolvedPath, lastModif, size, tagIds, long, comments)}
+    @staticmethod
+    def read(path, vault):
+        try:
+            with open(path, "rb") as reader:
+                magic, version = MhVaultSnapshot.HEADER.unpack(reader.read(MhVaultSnapshot.HEADER.size))
+                if magic != MhVaultSnapshot.MAGIC or version != MhVaultSnapshot.FORMAT_VERSION:
+                    logging.warning("MDR | Vault snapshot {} ignored: unsupported format".format(path))
+                    return None
+                data = json.loads(reader.read().decode("utf-8"))
+            if data["vault"] != vault:
+                logging.warning("MDR | Vault snapshot {} ignored: built from vault {}".format(path, data["vault"]))
+                return None
+            return {"folders": MhVaultSnapshot.folders(data), "files": MhVaultSnapshot.files(data)}
+        except FileNotFoundError:
+            return None
+        except Exception as e:  # Whatever the corruption, vault will be parsed
+            logging.warning("MDR | Vault snapshot {} ignored: {}".format(path, e))
+            return None
+
+    @staticmethod
+    def folders(data):
+        folders = data["folders"]
+        if not isinstance(folders, dict) or not all(isinstance(mtime, (int, float)) for mtime in folders.values()):
+            raise ValueError("invalid folders")
+        return folders
+
+    # Tag ids of the saved files converted to ids of the current TAG_TABLE ( returns list of (key, path, resolvedPath, lastModif, size, tagIds, long, comments) )
+    #    ValueError raised if an entry is not as written by save
+    @staticmethod
+    def files(data):
+        tags = data["tags"]
+        if not isinstance(tags, list) or not all(isinstance(tag, str) for tag in tags):
+            raise ValueError("invalid tags")
+        tagIds = array('I', [MhMarkdownFile.TAG_TABLE.tagId(tag) for tag in tags])
+        files = []
+        for key, path, resolvedPath, lastModif, size, savedIds, long, comments in data["files"]:
+            if not isinstance(key, str) or not isinstance(path, str) or not isinstance(resolvedPath, str) \
+                    or not isinstance(lastModif, (int, float)) or not (size is None or isinstance(size, int)) \
+                    or not isinstance(long, bool) or not MhVaultSnapshot.isComments(comments):
+                raise ValueError("invalid entry {}".format(key))
+            files.append((key, path, resolvedPath, lastModif, size, array('I', [tagIds[tagId] for tagId in savedIds]), long, comments))
+        return files
+
+    # Comments as extracted by MhMarkdownFile.loadComments: None or dict tag -> list of strings
+    @staticmethod
+    def isComments(comments):
+        if comments is None:
+            return True
+        return isinstance(comments, dict) and \
+            all(isinstance(lines, list) and all(isinstance(line, str) for line in lines) for lines in comments.values())
@@ -0,0 +1,69 @@
+# Copyright 2025 joetjo https://github.com/joetjo/OLA
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+import logging
+
+from base.persistentList import GhPersistentList
+
+
+#
+# Persistent cache of the tags extracted from each markdown file.
+#    key: path relative to the vault, entry is reused only if mtime and size are unchanged
+#
+class MhTagCache(GhPersistentList):
+    VERSION = 1
+
+    def __init__(self, path):
+        self.seen = set()
+        self.hits = 0
+        self.misses = 0
+        try:
+            super().__init__(path)
+        except ValueError:  # corrupted cache file: start from scratch
+            logging.warning("MDR | Tag cache {} unreadable, full parsing required".format(path))
+            self.values = dict()
+        if self.values.get("version") != MhTagCache.VERSION:
+            self.values = {"version": MhTagCache.VERSION, "files": dict()}
+        self.files = self.values["files"]
+
+    # Returns cached entry for the file or None if file has been modified since last parsing
+    def lookup(self, localPath, mtime, size):
+        self.seen.add(localPath)
+        try:
+            entry = self.files[localPath]
+            if entry["mtime"] == mtime and entry["size"] == size:
+                self.hits = self.hits + 1
+                return entry
+        except KeyError:
+            pass
+        self.misses = self.misses + 1
+        return None
+
+    def store(self, localPath, mtime, size, mdfile):
+        self.seen.add(localPath)
+        entry = mdfile.cacheData()
+        entry["mtime"] = mtime
+        entry["size"] = size
+        self.files[localPath] = entry
+
+    # Drop entries of files not detected during the last vault parsing ( deleted or renamed )
+    def prune(self):
+        for localPath in [p for p in self.files if p not in self.seen]:
+            del self.files[localPath]
+        self.seen = set()
+
+    def save(self):
+        logging.info("MDR | Tag cache: {} files reused, {} files parsed".format(self.hits, self.misses))
+        super().save()
+        self.hits = 0
+        self.misses = 0
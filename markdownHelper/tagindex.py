@@ -0,0 +1,53 @@
+# Copyright 2025 joetjo https://github.com/joetjo/OLA
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+from bisect import bisect_left
+
+from markdownHelper.markdownfile import MhMarkdownFile
+
+# Greater than any character allowed in a tag: upper bound of a prefix range
+PREFIX_END = "\U0010ffff"
+
+
+#
+# Inverted index of the vault: tag -> keys of the files having this tag
+#    Built from the vault files dict ( key -> MhMarkdownFile ), read only once built
+#
+class MhTagIndex:
+
+    def __init__(self, files):
+        filesById = dict()
+        for key, mdfile in files.items():
+            for tagId in mdfile.tagIds:
+                try:
+                    filesById[tagId].add(key)
+                except KeyError:
+                    filesById[tagId] = {key}
+        names = MhMarkdownFile.TAG_TABLE.tags
+        self.files = {names[tagId]: keys for tagId, keys in filesById.items()}
+        self.tags = sorted(self.files)
+
+    # Sorted tags like #XXXXX....  ( with prefix = 'XXXXX' )
+    def tagsStartingBy(self, prefix):
+        token = "#{}".format(prefix)
+        return self.tags[bisect_left(self.tags, token):bisect_left(self.tags, token + PREFIX_END)]
+
+    # Keys of the files having a tag like #XXXXX....  ( with prefix = 'XXXXX' ), same as MhMarkdownFile.hasTagStartingBy
+    def filesWithTagStartingBy(self, prefix):
+        tags = self.tagsStartingBy(prefix)
+        if len(tags) == 1:
+            return self.files[tags[0]]
+        result = set()
+        for tag in tags:
+            result.update(self.files[tag])
+        return result
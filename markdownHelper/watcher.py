@@ -0,0 +1,228 @@
+# Copyright 2025 joetjo https://github.com/joetjo/OLA
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+import time
+
+
+#
+# Linux only: kernel notification of vault changes ( one watch per folder )
+#
+class MhInotifyBackend:
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ISDIR = 0x40000000
+    MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    EVENT = struct.Struct("iIII")
+
+    def __init__(self, watcher):
+        self.watcher = watcher
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.paths = dict()  # watch descriptor -> folder
+        self.addFolder(watcher.root)
+
+    def addFolder(self, folder):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(folder), MhInotifyBackend.MASK)
+        if wd < 0:
+            logging.warning("MDR | Watcher: unable to watch {} (errno {})".format(folder, ctypes.get_errno()))
+            return
+        self.paths[wd] = folder
+        try:
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    if entry.is_dir() and not self.watcher.isIgnored(entry.path):
+                        self.addFolder(entry.path)
+        except OSError:
+            pass  # folder removed meanwhile, its deletion event will follow
+
+    def removeFolder(self, folder):
+        for wd, path in list(self.paths.items()):
+            if path == folder or path.startswith(folder + os.sep):
+                self.libc.inotify_rm_watch(self.fd, wd)
+                del self.paths[wd]
+
+    def poll(self, timeout):
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return
+        try:
+            data = os.read(self.fd, 65536)
+        except BlockingIOError:
+            return
+        pos = 0
+        while pos < len(data):
+            wd, mask, cookie, length = MhInotifyBackend.EVENT.unpack_from(data, pos)
+            pos = pos + MhInotifyBackend.EVENT.size
+            name = data[pos:pos + length].rstrip(b"\0")
+            pos = pos + length
+            if mask & MhInotifyBackend.IN_Q_OVERFLOW:
+                self.watcher.rescan()
+                continue
+            if mask & MhInotifyBackend.IN_IGNORED:
+                self.paths.pop(wd, None)
+                continue
+            try:
+                path = os.path.join(self.paths[wd], os.fsdecode(name))
+            except KeyError:
+                continue
+            if self.watcher.isIgnored(path):
+                continue
+            if mask & MhInotifyBackend.IN_ISDIR:
+                if mask & (MhInotifyBackend.IN_CREATE | MhInotifyBackend.IN_MOVED_TO):
+                    self.addFolder(path)
+                    self.watcher.notify(changed=path)
+                elif mask & (MhInotifyBackend.IN_DELETE | MhInotifyBackend.IN_MOVED_FROM):
+                    self.removeFolder(path)
+                    self.watcher.notify(deleted=path)
+            elif path.endswith(".md"):
+                if mask & (MhInotifyBackend.IN_DELETE | MhInotifyBackend.IN_MOVED_FROM):
+                    self.watcher.notify(deleted=path)
+                elif mask & (MhInotifyBackend.IN_CLOSE_WRITE | MhInotifyBackend.IN_MOVED_TO):
+                    self.watcher.notify(changed=path)
+
+    def close(self):
+        os.close(self.fd)
+
+
+#
+# Any platform: compare mtime and size of all markdown files at each poll
+#
+class MhPollingBackend:
+
+    def __init__(self, watcher, interval):
+        self.watcher = watcher
+        self.interval = interval
+        self.files = self.scan()
+        self.lastScan = time.time()
+
+    def scan(self):
+        result = dict()
+        folders = [self.watcher.root]
+        while len(folders) > 0:
+            try:
+                with os.scandir(folders.pop()) as entries:
+                    for entry in entries:
+                        if entry.name in self.watcher.ignore:
+                            continue
+                        if not entry.is_file():
+                            folders.append(entry.path)
+                        elif entry.name.endswith(".md"):
+                            stat = entry.stat()
+                            result[entry.path] = (stat.st_mtime, stat.st_size)
+            except OSError:
+                pass  # folder removed while scanning, next poll will see it
+        return result
+
+    def poll(self, timeout):
+        time.sleep(timeout)
+        if time.time() - self.lastScan < self.interval:
+            return
+        current = self.scan()
+        self.lastScan = time.time()
+        for path, info in current.items():
+            if self.files.get(path) != info:
+                self.watcher.notify(changed=path)
+        for path in self.files:
+            if path not in current:
+                self.watcher.notify(deleted=path)
+        self.files = current
+
+    def close(self):
+        pass
+
+
+#
+# Watch markdown files of a vault and notify listener with batch of changes
+#    listener(changed, deleted): lists of absolute path ( deleted path may be a folder )
+#    Changes are delivered from the watcher thread once no event has been received during delay seconds
+#
+class MhVaultWatcher:
+
+    def __init__(self, root, ignore, listener, delay=0.3, interval=1.0, polling=False):
+        self.root = root
+        self.ignore = ignore
+        self.listener = listener
+        self.delay = delay
+        self.interval = interval
+        self.polling = polling or not sys.platform.startswith("linux")
+        self.changed = set()
+        self.deleted = set()
+        self.lastEvent = 0
+        self.running = False
+        self.thread = None
+
+    def isIgnored(self, path):
+        for name in os.path.relpath(path, self.root).split(os.sep):
+            if name in self.ignore:
+                return True
+        return False
+
+    def notify(self, changed=None, deleted=None):
+        if changed is not None:
+            self.changed.add(changed)
+        if deleted is not None:
+            self.deleted.add(deleted)
+        self.lastEvent = time.time()
+
+    # Events lost: the whole vault is reloaded
+    def rescan(self):
+        logging.warning("MDR | Watcher: events lost, full vault reload requested")
+        self.notify(changed=self.root, deleted=self.root)
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name="MhVaultWatcher", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def run(self):
+        backend = None
+        if not self.polling:
+            try:
+                backend = MhInotifyBackend(self)
+            except (OSError, AttributeError) as e:
+                logging.warning("MDR | Watcher: inotify not available ({}), polling used".format(e))
+        if backend is None:
+            backend = MhPollingBackend(self, self.interval)
+        logging.info("MDR | Watching vault {} ({})".format(self.root, type(backend).__name__))
+        try:
+            while self.running:
+                backend.poll(self.delay)
+                if (len(self.changed) > 0 or len(self.deleted) > 0) and time.time() - self.lastEvent >= self.delay:
+                    changed = sorted(self.changed)
+                    deleted = sorted(self.deleted)
+                    self.changed = set()
+                    self.deleted = set()
+                    self.listener(changed, deleted)
+        finally:
+            backend.close()
@@ -0,0 +1,63 @@
+# Copyright 2025 joetjo https://github.com/joetjo/OLA
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+import argparse
+import logging
+import multiprocessing
+import sys
+
+from markdownHelper.markdown import MarkdownHelper
+
+
+# Reports generation without GUI: progress is only logged
+class OLAReportSignal:
+    def emit(self, *args):
+        pass
+
+
+# Generate reports of the vault set up in $home/.markdownHelper.json ( same as Reports tab )
+#    python ola-reports.py [--profile] [target ...]
+def main():
+    parser = argparse.ArgumentParser(description="OLA markdown reports generation")
+    parser.add_argument("--profile", action="store_true",
+                        help="profile each bloc of the reports ( saved in the profiles folder as .profile.json and .profile.txt )")
+    parser.add_argument("targets", nargs="*", help="targets of the reports to generate ( all reports if none )")
+    args = parser.parse_args()
+
+    vault = MarkdownHelper()
+    if args.profile:
+        vault.REPORT_PROFILE = True
+    signal = OLAReportSignal()
+    if len(args.targets) == 0:
+        written, unchanged = vault.generateAllReports(signal, signal)
+        logging.info("OLAReports - {} reports written, {} unchanged".format(written, unchanged))
+    else:
+        for target in args.targets:
+            vault.generateReport(target, signal, signal)
+    for target, profile in vault.PROFILES.items():
+        logging.info("OLAReports - {}: {}".format(target, profile.description()))
+
+
+stdout = logging.StreamHandler(stream=sys.stdout)
+stdout.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+logger = logging.getLogger()
+# Remove default handler ( stderr ) set up by the first log of imported modules
+for handler in list(logger.handlers):
+    logger.removeHandler(handler)
+logger.setLevel(logging.INFO)
+logger.addHandler(stdout)
+
+# Worker processes ( vault parsing, reports generation ) re-import this module: generation must not be started again
+if __name__ == "__main__":
+    multiprocessing.freeze_support()  # pyInstaller package
+    main()
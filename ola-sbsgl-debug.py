@@ -12,6 +12,7 @@
 #   See the License for the specific language governing permissions and
 #   limitations under the License.
 import logging
+import multiprocessing
 import sys
 from pathlib import Path
 
@@ -44,6 +45,9 @@ print("OLA Loggers setup:")
 for handler in logger.handlers:
     print(handler)
 
-app = OLAApplication(sys.argv, OLAVersionInfo.VERSION)
-app.start()
-logging.info("OLAApplication - application terminated")
\ No newline at end of file
+# Worker processes ( vault parsing ) re-import this module: application must not be started again
+if __name__ == "__main__":
+    multiprocessing.freeze_support()  # pyInstaller package
+    app = OLAApplication(sys.argv, OLAVersionInfo.VERSION)
+    app.start()
+    logging.info("OLAApplication - application terminated")
\ No newline at end of file
@@ -32,7 +32,7 @@ from base.setup import GhSetup
 from resources.resources import Icons
 from resources.olagui import GhGui, GhStyle
 from sbsgl.sbsgl import SBSGL
-from sbsgl.tools import MdReportGenerator, FileUsageGenerator, SgSGLProcessScanner, OLABackend
+from sbsgl.tools import MdReportGenerator, FileUsageGenerator, SgSGLProcessScanner, OLABackend, OLAVaultWatcher, OLAVaultChanges
 
 
 class OLAVersionInfo:
@@ -44,6 +44,7 @@ class OLAGuiSetup:
     DEV_MODE = True
     # Constants - not (yet?) configurable
     PROCESS_SCANNER_TIMER = 20 * 1000
+    JOBS_STOP_TIMEOUT = 10  # seconds waited on exit for the running vault job
     GAME_NAME_MIN_WIDTH = 200
     TAG_MIN_WIDTH = 60
     VISIBLE_SESSION_COUNT = 20
@@ -65,6 +66,7 @@ class OLAGuiSetup:
     HEIGHT = "height"
     WIDTH = "width"
     DEFAULT_GAME_FOLDER = "default game folder"
+    VAULT_WATCHER = "vault watcher"
 
     @staticmethod
     def getSetupEntry(name):
@@ -83,6 +85,7 @@ class OLAGuiSetup:
         self.height = self.initSetupEntry(OLAGuiSetup.HEIGHT, 0)
         self.width = self.initSetupEntry(OLAGuiSetup.WIDTH, 0)
         self.default_game_folder = self.initSetupEntry(OLAGuiSetup.DEFAULT_GAME_FOLDER, "")
+        self.vault_watcher = self.initSetupEntry(OLAGuiSetup.VAULT_WATCHER, False)
 
     def initSetupEntry(self, name, default_value):
         reset = ""
@@ -115,22 +118,6 @@ class OLAGuiSetup:
         self.dirty = False
 
 
-class OLALock:
-    MDENGINE = False
-
-    @staticmethod
-    def takeMdEngine():
-        if OLALock.MDENGINE:
-            return False
-        else:
-            OLALock.MDENGINE = True
-            return True
-
-    @classmethod
-    def releaseMDEngine(cls):
-        OLALock.MDENGINE = False
-
-
 class OLAGui:
     APP = None
     MAIN = None
@@ -1104,7 +1091,8 @@ class OLADetailedReportLine(OLABaseReportLine):
         bDesc.clicked.connect(self.showHideDescription)
         layout.addWidget(bDesc, row + 1, 1)
 
-        self.desc = QLabel(reportData["description"])
+        self.description = reportData["description"]
+        self.desc = QLabel(self.description)
         self.desc.setStyleSheet(GhStyle.STYLE_QLABEL_COMMENT)
         self.desc.setVisible(False)
         layout.addWidget(self.desc, row + 3, 3)
@@ -1113,6 +1101,8 @@ class OLADetailedReportLine(OLABaseReportLine):
         self.countLabel.setText("{}".format(OLABackend.VAULT.REPORT_INFO.get(self.sname)))
 
     def showHideDescription(self):
+        if not self.desc.isVisible():
+            self.desc.setText(self.description + OLABackend.VAULT.profileDescription(self.sheet))
         self.desc.setVisible(not self.desc.isVisible())
 
     def noteTextUpdated(self):
@@ -1125,7 +1115,7 @@ class OLADetailedReportLine(OLABaseReportLine):
         self.noteEdited = False
         if self.sname is not None:
             OLABackend.VAULT.NOTES.set(self.sname, self.info.text())
-            OLABackend.VAULT.NOTES.save()
+            OLABackend.VAULT.NOTES.scheduleSave()  # written in background, GUI not blocked
 
 
 class OLAReports(QWidget):
@@ -1139,6 +1129,8 @@ class OLAReports(QWidget):
         self.reportLines = []
         self.currentFiltering = None
         self.start = time.time()
+        # Written / unchanged reports of the last full generation, displayed once generation is finished
+        self.summary = ""
 
         layout = QVBoxLayout()
         self.setLayout(layout)
@@ -1161,11 +1153,21 @@ class OLAReports(QWidget):
         statusLine.layout().addStretch()
         self.linkErrorMessage = QLabel("")
         statusLine.layout().addWidget(self.linkErrorMessage)
+        self.profileSelector = QCheckBox("Profile")
+        self.profileSelector.setToolTip("Explain mode: profile each bloc of the reports generated\n"
+                                        "( saved in the profiles folder as .profile.json and .profile.txt )")
+        if OLABackend.VAULT.REPORT_PROFILE:
+            self.profileSelector.setCheckState(Qt.CheckState.Checked)
+        self.profileSelector.stateChanged.connect(self.profileChanged)
+        statusLine.layout().addWidget(self.profileSelector)
         layout.addWidget(statusLine)
 
         if OLABackend.VAULT.reports is not None:
             OLAGui.REPORTS.setReports(OLABackend.VAULT.reports, generateButtonState=generateButtonState)
 
+    def profileChanged(self):
+        OLABackend.VAULT.REPORT_PROFILE = self.profileSelector.isChecked()
+
     def reportAvailable(self, name, sheetPath):
         self.setStatus("{} ({}) generated".format(name, sheetPath))
         self.reports[sheetPath].enableVault()
@@ -1803,12 +1805,15 @@ class OLAObsidianAssistant(OLASharedGameListWidget):
         self.col1.setText(self.title)
 
     def vaultParsed(self):
-        OLALock.releaseMDEngine()
+        self.vaultUpdated()
+        if OLAGui.REPORTS is not None:
+            OLAGui.REPORTS.setStatus("Reports generation finished{}".format(OLAGui.REPORTS.summary))
+            OLAGui.REPORTS.summary = ""
+
+    def vaultUpdated(self):
         self.title = "Vault: {} files, {} tags".format(len(OLABackend.VAULT.SORTED_FILES), len(OLABackend.VAULT.TAGS))
         self.col1.setText(self.title)
         self.loadPlaying()
-        if OLAGui.REPORTS is not None:
-            OLAGui.REPORTS.setStatus("Reports generation finished")
 
 
 class OLAExcludedGame(QWidget):
@@ -1939,14 +1944,18 @@ class OLAApplication(QApplication):
         self.splash.show()
         self.processEvents()
 
-        # Blocking parsing of vault or display will be wrong
-        mdgen = MdReportGenerator(allReports=False, initReportsList=True)
-        mdgen.run()
+        # Vault restored from last run snapshot ( changes applied in background once started )
+        # or blocking parsing of vault or display will be wrong
+        self.vaultRevalidation = MdReportGenerator.loadSnapshot()
+        if not self.vaultRevalidation:
+            mdgen = MdReportGenerator(allReports=False, initReportsList=True)
+            mdgen.run()
 
         self.processEvents()
 
         OLAGui.APP = self
         self.setQuitOnLastWindowClosed(True)
+        self.aboutToQuit.connect(self.quitting)  # Exit menu or last window closed
         self.setWindowIcon(Icons.APP)
         self.main = OLAMainWindow(version)
         self.threadpool = QThreadPool()
@@ -1962,6 +1971,8 @@ class OLAApplication(QApplication):
         self.scanInProgress = False
         self.scanRejected = 0
 
+        self.vaultWatcher = None
+
     def showAbout(self):
         about = OlaAbout(OLABackend.VAULT.VAULT)
         about.show()
@@ -1973,6 +1984,12 @@ class OLAApplication(QApplication):
         self.startProcessCheck()
         OLAGui.ASSISTANT.vaultParsed()
         OLAGui.PLAYING_PANEL.refreshVault()
+        if self.vaultRevalidation:
+            self.revalidateVault()
+        if self.olaSetup.vault_watcher:
+            self.vaultWatcher = OLAVaultWatcher()
+            self.vaultWatcher.signals.vault_changed.connect(self.vaultChanged)
+            self.vaultWatcher.start()
         self.main.show()
         self.exec()
 
@@ -1999,44 +2016,80 @@ class OLAApplication(QApplication):
     def shutdown(self):
         self.main.storeGuiState(self.olaSetup)
         self.olaSetup.save()
-        QCoreApplication.quit()
+        QCoreApplication.quit()  # see quitting
+
+    # Vault work stopped and saved, whatever the way application is closed
+    def quitting(self):
+        if self.vaultWatcher is not None:
+            self.vaultWatcher.stop()
+        if OLABackend.JOBS is not None:
+            OLABackend.JOBS.stop(OLAGuiSetup.JOBS_STOP_TIMEOUT)  # running job cancelled at its next checkpoint
+        if OLABackend.VAULT is not None:
+            OLABackend.VAULT.saveSnapshot()
+        self.flushPending()
+
+    # Vault jobs are queued ( see OLABackend.jobs ): returns False if the same job is already waiting
+    @staticmethod
+    def submitVaultJob(mdgen, priority, key, preemptive=False, resources=()):
+        job = OLABackend.jobs().submit(mdgen, priority, key=key, preemptive=preemptive, resources=resources)
+        if job.task is not mdgen:
+            OLAGui.MAIN.setStatus("Vault {} already requested".format(job.name))
+            return False
+        return True
+
+    # Changes saved in background are written now, whatever the way application is closed
+    def flushPending(self):
+        pending = []
+        if OLABackend.VAULT is not None:
+            pending.append(OLABackend.VAULT.NOTES)  # note changes
+        if OLABackend.SBSGL is not None:
+            pending.append(OLABackend.SBSGL.procmgr.storage)  # games and sessions changes
+        for storage in pending:
+            try:
+                storage.flush()
+            except OSError as e:
+                logging.error("Unable to save pending changes: {}".format(e))
 
     def parseVault(self):
-        if OLALock.takeMdEngine():
+        mdgen = MdReportGenerator(allReports=False)
+        mdgen.signals.md_report_generation_finished.connect(self.mdParsed)
+        if self.submitVaultJob(mdgen, OLABackend.PRIORITY_PARSE, "parse"):
+            OLAGui.ASSISTANT.vaultParsingInProgress()
+
+    # Apply changes done in the vault since the snapshot has been saved
+    def revalidateVault(self):
+        mdgen = MdReportGenerator(allReports=False, refresh=True)
+        mdgen.signals.md_report_generation_finished.connect(self.mdParsed)
+        if self.submitVaultJob(mdgen, OLABackend.PRIORITY_PARSE, "refresh"):
             OLAGui.ASSISTANT.vaultParsingInProgress()
-            mdgen = MdReportGenerator(allReports=False)
-            mdgen.signals.md_report_generation_finished.connect(self.mdParsed)
-            self.threadpool.start(mdgen)
-        else:
-            OLAGui.MAIN.setStatus("Obsidian Vault engine already running")
 
     def startReporting(self):
-        if OLALock.takeMdEngine():
+        mdgen = MdReportGenerator(allReports=True)
+        mdgen.signals.md_report_generation_finished.connect(self.mdParsed)
+        mdgen.signals.md_report_generation_starting.connect(self.mdStarting)
+        mdgen.signals.md_last_report.connect(self.mdReportGenerated)
+        mdgen.signals.md_reports_written.connect(self.mdReportsWritten)
+        if self.submitVaultJob(mdgen, OLABackend.PRIORITY_ALL_REPORTS, "all reports"):
             if OLAGui.REPORTS is not None:
                 OLAGui.REPORTS.start = time.time()
+                OLAGui.REPORTS.summary = ""
             OLAGui.TAB_PANEL.clearReportsTab()
             OLAGui.ASSISTANT.vaultReportInProgress()
-            mdgen = MdReportGenerator(allReports=True)
-            mdgen.signals.md_report_generation_finished.connect(self.mdParsed)
-            mdgen.signals.md_report_generation_starting.connect(self.mdStarting)
-            mdgen.signals.md_last_report.connect(self.mdReportGenerated)
-            self.threadpool.start(mdgen)
 
             filegen = FileUsageGenerator()
             filegen.signals.file_usage_generation_finished.connect(self.fileUsageGenerated)
             filegen.signals.sheet_link_progress.connect(self.sheetLinkProgress)
             filegen.signals.sheet_link_finished.connect(self.sheetLinkChecked)
             self.threadpool.start(filegen)
-        else:
-            OLAGui.MAIN.setStatus("Vault engine already running")
 
+    # Single report preempts a running generation of all reports ( run between two reports )
     def startSingleReport(self, target):
         OLAGui.REPORTS.start = time.time()
         mdgen = MdReportGenerator(target=target, allReports=False)
         mdgen.signals.md_report_generation_finished.connect(self.ignoreSignal)
         mdgen.signals.md_report_generation_starting.connect(self.ignoreSignal)
         mdgen.signals.md_last_report.connect(self.mdReportGenerated)
-        self.threadpool.start(mdgen)
+        self.submitVaultJob(mdgen, OLABackend.PRIORITY_REPORT, ("report", target), preemptive=True, resources=[target])
 
     def ignoreSignal(self):
         pass
@@ -2056,9 +2109,24 @@ class OLAApplication(QApplication):
         self.main.setStatus("Failed to start game")
         OLAGui.PLAYING_PANEL.gameLaunchFailure()
 
+    # Changes applied by the vault jobs thread, merged with the ones still waiting
+    def vaultChanged(self, changed, deleted):
+        changes = OLAVaultChanges(changed, deleted)
+        changes.signals.vault_updated.connect(self.vaultUpdated)
+        OLABackend.jobs().submit(changes, OLABackend.PRIORITY_CHANGES, key="changes", merge=changes.merge)
+
+    def vaultUpdated(self, count):
+        self.main.setStatus("Vault updated: {} changes".format(count))
+        OLAGui.ASSISTANT.vaultUpdated()
+        OLAGui.SESSIONS.loadSessions()
+        OLAGui.PLAYING_PANEL.refreshVault()
+
     def mdReportGenerated(self, reportName, sheet):
         OLAGui.REPORTS.reportAvailable(reportName, sheet)
 
+    def mdReportsWritten(self, written, unchanged):
+        OLAGui.REPORTS.summary = ": {} written, {} unchanged".format(written, unchanged)
+
     def mdParsed(self):
         self.checkSplash()
         self.main.setStatus("Vault parsed")
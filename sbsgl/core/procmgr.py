@@ -52,7 +52,8 @@ class ProcMgr:
         self.currentGame = GameProcessHolder()
         self.previousGame = GameProcessHolder()
 
-        self.storage = GhStorage(LOCAL_STORAGE, "SBSGL", version=SbSGLLauncher.DB_VERSION)
+        # Scans may change the storage several times: written in background, at most once per GhWriteBehind.FLUSH_DELAY
+        self.storage = GhStorage(LOCAL_STORAGE, "SBSGL", version=SbSGLLauncher.DB_VERSION, writeBehind=True)
         StorageVersion.check_migration(self.storage, SbSGLLauncher.DB_VERSION)
 
         try:
@@ -16,13 +16,16 @@ import logging
 import os
 import re
 import subprocess
+from pathlib import Path
 
 from PySide6.QtCore import QRunnable, Slot, QObject, Signal
 
 from base.fileutil import GhFileUtil
 from base.osutil import OSUtil
 from diskAnalyser.DiskAnalyser import DiskAnalyser
+from markdownHelper.jobs import MhJobScheduler
 from markdownHelper.markdown import MarkdownHelper
+from markdownHelper.watcher import MhVaultWatcher
 
 
 class OLABackend:
@@ -30,6 +33,20 @@ class OLABackend:
     VAULT = None
     VAULT_READY = False
     THPOOL = None
+    JOBS = None
+
+    # Priority of vault jobs ( lower runs first ): a single report preempts a running batch between two reports
+    PRIORITY_CHANGES = 0
+    PRIORITY_REPORT = 1
+    PRIORITY_PARSE = 2
+    PRIORITY_ALL_REPORTS = 3
+
+    # Scheduler owning the vault: every vault work ( parsing, reports, changes ) is run by its thread
+    @staticmethod
+    def jobs():
+        if OLABackend.JOBS is None:
+            OLABackend.JOBS = MhJobScheduler()
+        return OLABackend.JOBS
 
     @staticmethod
     def openInVault(fullpath=None, sheetName=None):
@@ -53,6 +70,7 @@ class MdReportGeneratorSignals(QObject):
     md_report_generation_failure = Signal(object)  # to send report failure message
     md_report_generation_starting = Signal(object) # to notify all reports has been loaded and generation is starting
     md_last_report = Signal(object, object)
+    md_reports_written = Signal(object, object)    # count of report files written, count of reports unchanged
 
 
 class FileUsageGeneratorSignals(QObject):
@@ -61,6 +79,14 @@ class FileUsageGeneratorSignals(QObject):
     sheet_link_finished = Signal(object, object, object, object, object)
 
 
+class VaultWatcherSignals(QObject):
+    vault_changed = Signal(object, object)  # list of changed path, list of deleted path
+
+
+class VaultChangesSignals(QObject):
+    vault_updated = Signal(object)  # count of changes applied
+
+
 class SbSGLSignals(QObject):
     refresh_finished = Signal()
     refresh_done = Signal(object, object, object)
@@ -68,33 +94,54 @@ class SbSGLSignals(QObject):
     game_ended = Signal(object)
 
 
-class MdReportGenerator(QRunnable):
-    def __init__(self, allReports=True, initReportsList=True, target=None):
-        super().__init__()
+# Vault job ( see OLABackend.jobs ), run() may also be called directly when no other job can be running ( startup )
+class MdReportGenerator:
+    # refresh: vault parsed only if modified since last parsing ( vault restored from snapshot )
+    def __init__(self, allReports=True, initReportsList=True, target=None, refresh=False):
         self.signals = MdReportGeneratorSignals()
         self.allReports = allReports
         self.initReportsList = initReportsList
         self.target = target
+        self.refresh = refresh
         # Cache for report once data has been loaded
         self.reports = None
 
-    @Slot()  # QtCore.Slot
-    def run(self):
-        try:
+    # Vault parsed once and shared: report generation parses it again only if it has changed
+    @staticmethod
+    def initVault():
+        if OLABackend.VAULT is None:
             vault = "J:\\Nicol-Documents\\GitHub\\gList2"
             logging.info("Executing Markdown report module with hard coded vault: {}".format(vault))
             OLABackend.VAULT = MarkdownHelper(vault=vault)
+        return OLABackend.VAULT
+
+    # Returns True if vault content has been restored from the snapshot saved by last run
+    @staticmethod
+    def loadSnapshot():
+        OLABackend.VAULT_READY = MdReportGenerator.initVault().loadSnapshot()
+        return OLABackend.VAULT_READY
+
+    # job: MhJob running the generation ( cancellation and preemption checkpoints )
+    def run(self, job=None):
+        try:
+            MdReportGenerator.initVault()
             if self.allReports:
                 logging.info("Starting all reports generation")
-                OLABackend.VAULT.generateAllReports(self.signals.md_report_generation_starting, self.signals.md_last_report, reload=True)
+                written, unchanged = OLABackend.VAULT.generateAllReports(self.signals.md_report_generation_starting,
+                                                                         self.signals.md_last_report, job=job)
+                self.signals.md_reports_written.emit(written, unchanged)
                 logging.info("Generation Markdown reports finished")
             elif self.target is not None:
                 logging.info("Starting single report generation")
-                OLABackend.VAULT.generateReport(self.target, self.signals.md_report_generation_starting, self.signals.md_last_report)
+                OLABackend.VAULT.generateReport(self.target, self.signals.md_report_generation_starting, self.signals.md_last_report, job)
                 logging.info("Generation Markdown single report finished")
+            elif self.refresh:
+                logging.info("Checking vault changes...")
+                OLABackend.VAULT.refresh(job)
+                logging.info("Vault up to date")
             else:
                 logging.info("Loading vault...")
-                OLABackend.VAULT.parseVault(initReportsList=self.initReportsList)
+                OLABackend.VAULT.parseVault(initReportsList=self.initReportsList, job=job)
                 logging.info("Parse Vault finished")
                 OLABackend.VAULT_READY = True
 
@@ -102,6 +149,41 @@ class MdReportGenerator(QRunnable):
             self.signals.md_report_generation_finished.emit()
 
 
+class OLAVaultWatcher:
+    def __init__(self):
+        self.signals = VaultWatcherSignals()
+        self.watcher = None
+
+    # Changes are delivered through vault_changed signal and must be applied by receiver ( GUI thread )
+    def start(self):
+        # Rooted as parsed vault: reported paths match the parsed ones ( no trailing or doubled separator )
+        root = str(Path(OLABackend.VAULT.VAULT))
+        self.watcher = MhVaultWatcher(root, OLABackend.VAULT.IGNORE, self.signals.vault_changed.emit)
+        self.watcher.start()
+
+    def stop(self):
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+
+
+# Vault job applying the changes detected by the watcher, changes received while pending are merged
+class OLAVaultChanges:
+    def __init__(self, changed, deleted):
+        self.signals = VaultChangesSignals()
+        self.changed = list(changed)
+        self.deleted = list(deleted)
+
+    # Called with the pending job task: changes of this request are added to it
+    def merge(self, pending):
+        pending.changed.extend(path for path in self.changed if path not in pending.changed)
+        pending.deleted.extend(path for path in self.deleted if path not in pending.deleted)
+
+    def run(self, job=None):
+        OLABackend.VAULT.applyChanges(self.changed, self.deleted)
+        self.signals.vault_updated.emit(len(self.changed) + len(self.deleted))
+
+
 class FileUsageGenerator(QRunnable):
     def __init__(self):
         super().__init__()
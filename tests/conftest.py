@@ -0,0 +1,133 @@
+# Copyright 2025 joetjo https://github.com/joetjo/OLA
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+import json
+import os
+import random
+import time
+from pathlib import Path
+
+import pytest
+
+SETUP_SAMPLE = Path(__file__).parent.parent / "doc" / "md_report_setup.json"
+
+# Count of files of the synthetic vaults, raised to benchmark a real size vault ( e.g. OLA_BENCH_FILES=50000 )
+VAULT_FILES = int(os.environ.get("OLA_BENCH_FILES", "600"))
+
+EXTRA_TAGS = ["TYPE/RPG", "TYPE/RPG/Action", "TYPE/VN", "TYPE/Strategy", "STORY/StrongStory", "CAT/Puzzle", "NEXT/1",
+              "NEXT/2", "PLAY/INPROGRESS", "PLAY/DONE", "PLATFORM/STEAM", "PLATFORM/GOG", "DATE/2024", "DATE/2025",
+              "EDITOR/SomeEditor", "EDITOR/OtherOne", "EDTLOVE/1", "WISH/1", "DONE/1", "KEY/FemaleMC", "PLATFORM/",
+              "weird|pipe", "x", "TYPE/RPG.", "PLAY/IN_PROGRESS"]
+WORDS = ["lorem", "ipsum", "dolor", "sit", "amet", "éà", "NEXT"]
+
+BENCHMARKS = []
+
+
+def sampleTags(setup):
+    tags = set(EXTRA_TAGS)
+    pending = [setup]
+    while len(pending) > 0:
+        json = pending.pop()
+        if isinstance(json, dict):
+            tags.update(json.get("tag_condition", []))
+            pending.extend(json.values())
+        elif isinstance(json, list):
+            pending.extend(json)
+    for refTags in setup["global"]["shared_contents"]["tags"].values():
+        tags.update(refTags)
+    return sorted(tags)
+
+
+def sheetContent(rand, tags):
+    lines = []
+    for _ in range(rand.choice([3, 5, 10, 20, 59, 60, 61, 80])):
+        kind = rand.random()
+        if kind < 0.25:
+            lines.append("#{} {}".format(rand.choice(tags), " ".join(rand.choices(WORDS, k=rand.randint(0, 4)))))
+        elif kind < 0.35:
+            lines.append("| cell #{} | x |".format(rand.choice(tags)))
+        elif kind < 0.5:
+            lines.append(" ".join("#" + rand.choice(tags) for _ in range(rand.randint(1, 4))))
+        elif kind < 0.55:
+            lines.append("#{}#{}.".format(rand.choice(tags), rand.choice(tags)))
+        else:
+            lines.append(" ".join(rand.choices(WORDS, k=rand.randint(1, 12))) * rand.randint(1, 3))
+    separator = rand.choice(["\n", "\n", "\r\n"])
+    return separator.join(lines) + separator
+
+
+# Vault of count sheets tagged with the tags and stored in the paths used by the sample setup ( doc/md_report_setup.json )
+#    Same seed, same vault
+#    Returns the setup of the vault ( reports and notes stored in the vault )
+def buildVault(root, count, seed=1):
+    rand = random.Random(seed)
+    with open(SETUP_SAMPLE, encoding="utf-8") as reader:
+        setup = json.load(reader)
+    setup["global"]["base_folder"] = str(root)
+    folders = {path.replace("\\", "/") for paths in setup["global"]["shared_contents"]["paths"].values() for path in paths}
+    folders = sorted(folders) + ["other", "misc/sub"]
+    for folder in folders:
+        os.makedirs(os.path.join(root, folder), exist_ok=True)
+    for report in setup["global"]["reports"].values():
+        report["target"] = report["target"].replace("\\", "/")
+        os.makedirs(os.path.dirname(os.path.join(root, report["target"])), exist_ok=True)
+    tags = sampleTags(setup)
+    for number in range(count):
+        name = "Game {} {}.md".format(number, rand.choice(WORDS))
+        with open(os.path.join(root, rand.choice(folders), name), "w", encoding="utf-8", newline="") as writer:
+            writer.write(sheetContent(rand, tags))
+    return setup
+
+
+# Builds a synthetic vault and makes it the vault set up for MarkdownHelper ( $HOME/.markdownHelper.json )
+#    syntheticVault(name, count, seed, **globalValues): returns the vault root, globalValues override the setup values
+@pytest.fixture
+def syntheticVault(tmp_path, monkeypatch):
+    def build(name="vault", count=VAULT_FILES, seed=1, **globalValues):
+        root = tmp_path / name
+        setup = buildVault(root, count, seed)
+        setup["global"].update(globalValues)
+        home = tmp_path / "{}_home".format(name)
+        home.mkdir()
+        with open(home / ".markdownHelper.json", "w", encoding="utf-8") as writer:
+            json.dump(setup, writer, indent=2)
+        monkeypatch.setenv("HOME", str(home))
+        monkeypatch.setenv("USERPROFILE", str(home))
+        return root
+
+    return build
+
+
+# Measures displayed at the end of the test session
+class Benchmark:
+    def record(self, name, value, unit="s"):
+        BENCHMARKS.append((name, value, unit))
+
+    # Returns the result of function, its duration recorded
+    def time(self, name, function, *args, **kwargs):
+        start = time.perf_counter()
+        result = function(*args, **kwargs)
+        self.record(name, time.perf_counter() - start)
+        return result
+
+
+@pytest.fixture
+def benchmark():
+    return Benchmark()
+
+
+def pytest_terminal_summary(terminalreporter):
+    if len(BENCHMARKS) > 0:
+        terminalreporter.section("benchmarks ({} files per vault, OLA_BENCH_FILES)".format(VAULT_FILES))
+        for name, value, unit in BENCHMARKS:
+            terminalreporter.write_line("{:<60} {:>12.3f} {}".format(name, value, unit))
@@ -0,0 +1,93 @@
+# Copyright 2025 joetjo https://github.com/joetjo/OLA
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+import tracemalloc
+
+from markdownHelper.fileview import MhFileView
+
+FILE_COUNT = 20000
+DEPTH = 8
+
+
+class FakeFile:
+    def __init__(self, number):
+        self.number = number
+
+
+def match(level):
+    return lambda key, file: (file.number >> level) & 1 == 0
+
+
+# Sets of files kept alive by a report tree: at each level a bloc without condition ( copy ) and a filtering bloc ( split )
+def reportTree(files):
+    kept = []
+    for level in range(DEPTH):
+        files = files.copy()
+        kept.append(files)
+        if isinstance(files, MhFileView):
+            matching, others = files.split(match(level))
+        else:
+            matching = dict()
+            others = dict()
+            for key, file in files.items():
+                if match(level)(key, file):
+                    matching[key] = file
+                else:
+                    others[key] = file
+        kept.extend([matching, others])
+        files = others
+    return kept
+
+
+def allocated(files):
+    tracemalloc.start()
+    try:
+        tree = reportTree(files)
+        return tracemalloc.get_traced_memory()[0], tree
+    finally:
+        tracemalloc.stop()
+
+
+def vault():
+    keys = ["sheet {:05}".format(number) for number in range(FILE_COUNT)]
+    return keys, [FakeFile(number) for number in range(FILE_COUNT)]
+
+
+def test_view_content_same_as_dict():
+    keys, files = vault()
+    views = reportTree(MhFileView(tuple(keys), tuple(files)))
+    dicts = reportTree(dict(zip(keys, files)))
+    for view, filesDict in zip(views, dicts):
+        assert list(view.items()) == list(filesDict.items())
+        assert len(view) == len(filesDict)
+
+
+def test_view_copy_allocates_nothing():
+    keys, files = vault()
+    view = MhFileView(tuple(keys), tuple(files))
+    tracemalloc.start()
+    try:
+        copies = [view.copy() for _ in range(100)]
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    assert all(copy is view for copy in copies)
+    assert size < 4096
+
+
+def test_views_allocate_less_than_dicts():
+    keys, files = vault()
+    viewSize, views = allocated(MhFileView(tuple(keys), tuple(files)))
+    dictSize, dicts = allocated(dict(zip(keys, files)))
+    # 4 bytes per file in a view, a dict entry needs at least the key and value pointers and the hash
+    assert viewSize * 4 < dictSize, "views: {} bytes, dicts: {} bytes".format(viewSize, dictSize)
@@ -0,0 +1,103 @@
+# Copyright 2025 joetjo https://github.com/joetjo/OLA
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+import threading
+
+import pytest
+
+from markdownHelper.jobs import MhJob, MhJobScheduler
+
+
+# Task recording its steps in done, steps are separated by preemption checkpoints
+class Task:
+    def __init__(self, name, done, steps=0, busy=(), started=None, release=None):
+        self.name = name
+        self.done = done
+        self.steps = steps
+        self.busy = busy
+        self.started = started
+        self.release = release
+
+    def run(self, job):
+        if self.started is not None:
+            self.started.set()
+            self.release.wait(5)
+        self.done.append(self.name)
+        for step in range(self.steps):
+            job.checkpoint(preempt=True, busy=self.busy)
+            self.done.append("{}.{}".format(self.name, step))
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = MhJobScheduler("test")
+    yield scheduler
+    scheduler.stop(5)
+
+
+# Submitted jobs wait until the returned event is set ( a first job blocks the scheduler thread )
+def blocked(scheduler, done):
+    started = threading.Event()
+    release = threading.Event()
+    scheduler.submit(Task("blocker", done, started=started, release=release), 0)
+    started.wait(5)
+    return release
+
+
+def wait(scheduler, *jobs):
+    finished = threading.Event()
+    scheduler.submit(type("Last", (), {"run": lambda self, job: finished.set()})(), 99)
+    assert finished.wait(5)
+    for job in jobs:
+        assert job.state in (MhJob.DONE, MhJob.CANCELLED)
+
+
+def test_priority_coalescing_and_cancel(scheduler):
+    done = []
+    release = blocked(scheduler, done)
+    allReports = scheduler.submit(Task("all", done), 3, key="all")
+    assert scheduler.submit(Task("all again", done), 3, key="all") is allReports
+    parse = scheduler.submit(Task("parse", done), 2, key="parse")
+    cancelled = scheduler.submit(Task("cancelled", done), 1, key="cancelled")
+    cancelled.cancel()
+    release.set()
+    wait(scheduler, allReports, parse)
+    assert done == ["blocker", "parse", "all"]
+    assert cancelled.state == MhJob.CANCELLED
+
+
+def test_single_report_preempts_batch_unless_busy(scheduler):
+    done = []
+    started = threading.Event()
+    release = threading.Event()
+    batch = scheduler.submit(Task("batch", done, steps=3, busy={"reports/Busy.md"}, started=started, release=release), 3)
+    started.wait(5)
+    free = scheduler.submit(Task("free", done), 1, preemptive=True, resources=["reports/Free.md"])
+    busy = scheduler.submit(Task("busy", done), 1, preemptive=True, resources=["reports/Busy.md"])
+    release.set()
+    wait(scheduler, batch, free, busy)
+    # free report run at the first report boundary, busy one only once the batch is over
+    assert done == ["batch", "free", "batch.0", "batch.1", "batch.2", "busy"]
+
+
+def test_running_job_cancelled_at_checkpoint(scheduler):
+    done = []
+    started = threading.Event()
+    release = threading.Event()
+    job = scheduler.submit(Task("long", done, steps=100, started=started, release=release), 3)
+    started.wait(5)
+    job.cancel()
+    release.set()
+    wait(scheduler, job)
+    assert job.state == MhJob.CANCELLED
+    assert done == ["long"]
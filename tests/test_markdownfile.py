@@ -0,0 +1,113 @@
+# Copyright 2025 joetjo https://github.com/joetjo/OLA
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+import os
+import random
+import re
+from pathlib import Path
+
+import pytest
+
+from markdownHelper.markdownfile import MhMarkdownFile
+
+PIECES = ["#", "#a", "#TYPE/RPG", "#PLAY/INPROGRESS", "#PLATFORM/STEAM", "#PLATFORMX", "#PLAYER", "#TYPEZ", "|", "| x |",
+          " ", "\t", "é", "word", "\n", "\r\n", "\r", "#a|b", "##", "#x#y", ".", "/", "-", "_", "ü", "\x0b", "\x1c",
+          "﻿", "#éà", "  #tag  ", "x" * 60]
+
+CHUNK_SIZES = [1, 2, 3, 64, 4096]
+
+
+# Header parsing of the line by line text mode reader replaced by MhMarkdownFile.readLines ( kept as reference )
+#    Returns tags and comments
+def referenceHeader(path):
+    tags = []
+    comments = dict()
+    with open(path, 'r', encoding='utf8') as reader:
+        count = 0
+        for line in reader:
+            count = count + 1
+            if line.startswith("|"):
+                tags.append("#LONGSHEET/PIPE/LINE/{}".format(count))
+
+            if count > MhMarkdownFile.LONG_SHEET_HEADER_LINE:
+                tags.append("#LONGSHEET/SIZE/{}".format(os.path.getsize(path)))
+                if len(line) > MhMarkdownFile.LONG_SHEET_COMMENT_LEN:
+                    comment = "{}...".format(line[0:MhMarkdownFile.LONG_SHEET_COMMENT_LEN])
+                else:
+                    comment = line[0:len(line) - 1]
+                comments["#INFO"] = ["<pre>{}</pre>".format(comment.replace("|", " "))]
+                return tags, comments
+
+            if line.startswith("#"):
+                lineTags = re.findall(r"^#[\w|/_-]+", line)
+                if len(lineTags) > 0:
+                    lineTag = lineTags[0]
+                    comment = line[len(lineTag):len(line)].rstrip()
+                    if len(comment) > 0:
+                        comments.setdefault(lineTag, []).append(comment)
+            for tag in re.findall(r"#[\w|/_-]+[\s\S]", line):
+                tags.append(tag.rstrip())
+    return tags, comments
+
+
+def generatedContents(count, seed):
+    generator = random.Random(seed)
+    for i in range(count):
+        content = "".join(generator.choice(PIECES) for _ in range(generator.choice([3, 20, 100, 400, 1500])))
+        if generator.random() < 0.3:
+            content = "\n".join(content for _ in range(generator.randint(1, 5)))
+        yield content
+
+
+# Line count edges of the header ( 60 lines read, 61st flags a long sheet ) with every line end
+def edgeContents():
+    for end in ["\n", "\r\n", "\r"]:
+        for lines in [59, 60, 61, 62]:
+            for last in ["", end]:
+                for first in ["#TYPE/RPG comment", "| #PLAY/DONE |"]:
+                    body = end.join("{} {}".format(first, i) if i % 7 == 0 else "line {}".format(i) for i in range(lines))
+                    yield body + last
+                    yield body + end + "|" + "y" * 70 + last
+    yield "\r"
+    yield "\r\n"
+    yield "#a\r"
+    yield "#a\r\r\n#b"
+
+
+def checkSameAsReference(path, content):
+    with open(path, 'w', encoding='utf-8', newline='') as writer:
+        writer.write(content)
+    tags, comments = referenceHeader(path)
+    # size unknown ( file read up to its end ) or known from the folder scan ( file read up to this size )
+    for size in [None, os.path.getsize(path)]:
+        mdfile = MhMarkdownFile("x", Path(path), 0, size=size)
+        assert mdfile.tags == tags, repr(content)
+        mdfile.loadComments()
+        assert mdfile.tagsComment == comments, repr(content)
+        assert mdfile.platforms == [tag[10:] for tag in tags if tag.startswith("#PLATFORM")]
+        assert mdfile.type_tags == [tag[6:] for tag in tags if tag.startswith("#TYPE")]
+        assert mdfile.play_tags == [tag[6:] for tag in tags if tag.startswith("#PLAY")]
+
+
+@pytest.mark.parametrize("chunkSize", CHUNK_SIZES)
+def test_edge_contents_same_as_reference(tmp_path, monkeypatch, chunkSize):
+    monkeypatch.setattr(MhMarkdownFile, "HEADER_CHUNK_SIZE", chunkSize)
+    for content in edgeContents():
+        checkSameAsReference(tmp_path / "sheet.md", content)
+
+
+@pytest.mark.parametrize("chunkSize", CHUNK_SIZES)
+def test_generated_contents_same_as_reference(tmp_path, monkeypatch, chunkSize):
+    monkeypatch.setattr(MhMarkdownFile, "HEADER_CHUNK_SIZE", chunkSize)
+    for content in generatedContents(300, chunkSize):
+        checkSameAsReference(tmp_path / "sheet.md", content)
@@ -0,0 +1,43 @@
+# Copyright 2025 joetjo https://github.com/joetjo/OLA
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+import logging
+import os
+
+from markdownHelper.markdown import MarkdownHelper
+
+
+# Parsed content of the vault, paths relative to the vault ( same content expected from an identical vault )
+def parsedContent(mdhelper):
+    vaultLenPath = len(str(mdhelper.VAULT))
+    files = [(key, file.localPath, file.tags, file.long, file.size, file.resolvedPath[vaultLenPath:])
+             for key, file in mdhelper.FILES.items()]
+    folders = [os.path.relpath(folder, mdhelper.VAULT) for folder in mdhelper.FOLDERS]
+    return (files, list(mdhelper.TAGS.items()), folders, mdhelper.TYPE_TAGS, mdhelper.PLAY_TAGS,
+            [file.name for file in mdhelper.PLAY])
+
+
+# Vault built again for each parsing: files parsed, not restored from the tag cache of a previous parsing
+def parse(syntheticVault, benchmark, workers):
+    syntheticVault(name="parse_{}".format(workers), parse_workers=workers)
+    mdhelper = MarkdownHelper()
+    benchmark.time("vault parsing, {} workers".format(workers), mdhelper.parseVault, initReportsList=False)
+    return parsedContent(mdhelper)
+
+
+def test_parallel_parsing_same_vault(syntheticVault, benchmark, caplog):
+    caplog.set_level(logging.INFO)
+    expected = parse(syntheticVault, benchmark, 0)
+    assert len(expected[0]) >= MarkdownHelper.PARALLEL_MIN_FILES
+    assert parse(syntheticVault, benchmark, 2) == expected
+    assert "with 2 processes" in caplog.text
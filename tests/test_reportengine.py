@@ -0,0 +1,45 @@
+# Copyright 2025 joetjo https://github.com/joetjo/OLA
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+from markdownHelper.markdown import MarkdownHelper
+
+
+class NoSignal:
+    def emit(self, *args):
+        pass
+
+
+# Markdown files of the vault ( sheets and reports ): relative path -> content
+def markdownContents(root):
+    return {str(path.relative_to(root)): path.read_bytes() for path in root.rglob("*.md")}
+
+
+# Reports of a same vault generated by each engine ( vault built again for each: reports written are not parsed again )
+def generate(syntheticVault, benchmark, engine, workers=0):
+    root = syntheticVault(name="{}_{}".format(engine, workers), report_engine=engine, report_workers=workers)
+    mdhelper = MarkdownHelper()
+    written, unchanged = benchmark.time("all reports, {} engine, {} workers".format(engine, workers),
+                                        mdhelper.generateAllReports, NoSignal(), NoSignal(), reload=True)
+    assert unchanged == 0
+    return written, markdownContents(root)
+
+
+def test_bitset_engine_writes_same_reports(syntheticVault, benchmark):
+    written, files = generate(syntheticVault, benchmark, "files")
+    assert written > 0
+    assert generate(syntheticVault, benchmark, "bitset") == (written, files)
+
+
+def test_parallel_generation_writes_same_reports(syntheticVault, benchmark):
+    expected = generate(syntheticVault, benchmark, "files")
+    assert generate(syntheticVault, benchmark, "bitset", workers=2) == expected
@@ -0,0 +1,73 @@
+# Copyright 2025 joetjo https://github.com/joetjo/OLA
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+import hashlib
+import tracemalloc
+
+from markdownHelper.markdown import MarkdownHelper
+from markdownHelper.report import MhReport
+
+
+# Report content hashed as generated: memory measured is the memory used to select the files of the report
+class HashWriter:
+    def __init__(self):
+        self.digest = hashlib.sha1()
+
+    def write(self, text):
+        self.digest.update(text.encode("utf-8"))
+
+
+# Hash of the content of all reports of the vault generated from inputFiles ( reports not written )
+#    Returns the hashes and the highest peak of memory allocated while generating one report ( traced when tracing )
+def renderAll(mdhelper, snapshot, inputFiles):
+    contents = []
+    highest = 0
+    for reportTitle in mdhelper.REPORTS:
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+            start = tracemalloc.get_traced_memory()[0]
+        mhReport = MhReport(mdhelper.PLANS[reportTitle], mdhelper.VAULT, inputFiles, snapshot.tags, mdhelper.reports,
+                            snapshot.tagIndex, None, snapshot.pathIndex())
+        writer = HashWriter()
+        lines = mhReport.render(writer)
+        contents.append((reportTitle, lines, writer.digest.hexdigest()))
+        del mhReport
+        if tracemalloc.is_tracing():
+            highest = max(highest, tracemalloc.get_traced_memory()[1] - start)
+    return contents, highest
+
+
+def traced(mdhelper, snapshot, inputFiles):
+    tracemalloc.start()
+    try:
+        return renderAll(mdhelper, snapshot, inputFiles)
+    finally:
+        tracemalloc.stop()
+
+
+def test_file_view_reports_same_content_lower_peak(syntheticVault, benchmark):
+    syntheticVault()
+    mdhelper = MarkdownHelper()
+    mdhelper.parseVault()
+    snapshot = mdhelper.SNAPSHOT
+    # Comments loaded and indexes built once for the vault, before any measure
+    view = snapshot.fileView()
+    expected, unused = renderAll(mdhelper, snapshot, snapshot.files)
+
+    dictContents, dictPeak = traced(mdhelper, snapshot, snapshot.files)
+    viewContents, viewPeak = traced(mdhelper, snapshot, view)
+    benchmark.record("reports peak memory, dict inputs", dictPeak / 1024, "KB")
+    benchmark.record("reports peak memory, file view inputs", viewPeak / 1024, "KB")
+    assert dictContents == expected
+    assert viewContents == expected
+    assert viewPeak < dictPeak
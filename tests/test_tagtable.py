@@ -0,0 +1,107 @@
+# Copyright 2025 joetjo https://github.com/joetjo/OLA
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+import json
+import os
+import random
+import tracemalloc
+from pathlib import Path
+
+from conftest import SETUP_SAMPLE, VAULT_FILES, sampleTags
+from markdownHelper.markdownfile import MhMarkdownFile, MhTagTable
+
+VAULT = os.path.join(os.sep, "vault")
+
+
+# Sheet as stored before the tag table: each file keeps its own tag strings in plain lists
+class PlainMarkdownFile:
+    def __init__(self, name, path, vaultLenPath, tags, lastModif, size, resolvedPath):
+        self.name = name
+        self.path = path
+        self.localPath = str(path)[vaultLenPath:]
+        self.resolvedPath = resolvedPath
+        self.lastModif = lastModif
+        self.size = size
+        self.matchTag = None
+        self.tagsComment = dict()
+        self.long = False
+        self.tags = []
+        self.platforms = []
+        self.type_tags = []
+        self.play_tags = []
+        for tag in tags:
+            self.tags.append(tag)
+            if tag.startswith("#PLATFORM"):
+                self.platforms.append(tag[10:])
+            if tag.startswith("#TYPE"):
+                self.type_tags.append(tag[6:])
+            if tag.startswith("#PLAY"):
+                self.play_tags.append(tag[6:])
+
+
+# Tags of count sheets: strings built for each sheet, as extracted when parsing its file
+def sheetTags(count):
+    with open(SETUP_SAMPLE, encoding="utf-8") as reader:
+        tags = ["#{}".format(tag) for tag in sampleTags(json.load(reader))]
+    rand = random.Random(1)
+    for number in range(count):
+        # a distinct string for each tag of each sheet
+        sheet = [" {}".format(tag)[1:] for tag in rand.choices(tags, k=rand.randint(2, 20))]
+        sheet.extend("#LONGSHEET/PIPE/LINE/{}".format(line) for line in rand.sample(range(1, 61), rand.randint(0, 3)))
+        yield number, sheet
+
+
+def buildFiles(count, create):
+    files = dict()
+    vaultLenPath = len(VAULT) + 1
+    for number, tags in sheetTags(count):
+        name = "Game {}".format(number)
+        path = Path(VAULT, "games", "{}.md".format(name))
+        files[name] = create(name, path, vaultLenPath, tags, 1700000000.0 + number, 100 + len(tags), str(path))
+    return files
+
+
+def retained(count, create):
+    tracemalloc.start()
+    try:
+        files = buildFiles(count, create)
+        return tracemalloc.get_traced_memory()[0], files
+    finally:
+        tracemalloc.stop()
+
+
+def tableFile(name, path, vaultLenPath, tags, lastModif, size, resolvedPath):
+    return MhMarkdownFile(name, path, vaultLenPath, cached={"tags": tags, "comments": None, "long": False},
+                          lastModif=lastModif, size=size, resolvedPath=resolvedPath)
+
+
+def test_tag_table_files_same_tags(monkeypatch):
+    monkeypatch.setattr(MhMarkdownFile, "TAG_TABLE", MhTagTable())
+    plain = buildFiles(200, PlainMarkdownFile)
+    table = buildFiles(200, tableFile)
+    for name, file in plain.items():
+        assert table[name].tags == file.tags
+        assert table[name].platforms == file.platforms
+        assert table[name].type_tags == file.type_tags
+        assert table[name].play_tags == file.play_tags
+        assert table[name].localPath == file.localPath
+
+
+def test_tag_table_files_use_less_memory(monkeypatch, benchmark):
+    monkeypatch.setattr(MhMarkdownFile, "TAG_TABLE", MhTagTable())
+    plainSize, plain = retained(VAULT_FILES, PlainMarkdownFile)
+    del plain
+    tableSize, table = retained(VAULT_FILES, tableFile)
+    benchmark.record("vault memory, plain tag lists", plainSize / 1024, "KB")
+    benchmark.record("vault memory, tag table and slots", tableSize / 1024, "KB")
+    assert tableSize < plainSize * 0.6
@@ -0,0 +1,101 @@
+# Copyright 2025 joetjo https://github.com/joetjo/OLA
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+import json
+import os
+import time
+
+import pytest
+
+from base.jsonstore import GhStorage
+from base.persistentList import GhPersistentList
+from base.writebehind import GhWriteBehind
+
+
+@pytest.fixture
+def shortDelay(monkeypatch):
+    monkeypatch.setattr(GhWriteBehind, "FLUSH_DELAY", 0.2)
+
+
+def content(path):
+    with open(path, encoding='utf-8') as reader:
+        return json.load(reader)
+
+
+def test_one_write_per_window(tmp_path, monkeypatch, shortDelay):
+    path = tmp_path / "storage.json"
+    path.write_text('{"version": 4}', encoding='utf-8')
+    storage = GhStorage(str(path), "test", writeBehind=True)
+    writes = []
+    replace = os.replace
+    monkeypatch.setattr(os, "replace", lambda source, target: (writes.append(time.monotonic()), replace(source, target)))
+    start = time.monotonic()
+    while time.monotonic() - start < 0.5:
+        storage.data()["key{}".format(len(storage.data()))] = 1
+        storage.save()
+        time.sleep(0.01)
+    time.sleep(0.3)
+    assert 1 <= len(writes) <= 4
+    assert content(path) == storage.data()
+
+
+def test_flush_writes_pending_changes(tmp_path, shortDelay):
+    path = tmp_path / "storage.json"
+    path.write_text('{"version": 4}', encoding='utf-8')
+    storage = GhStorage(str(path), "test", writeBehind=True)
+    storage.data()["game"] = "x"
+    storage.save()
+    assert "game" not in content(path)
+    storage.flush()
+    assert content(path)["game"] == "x"
+    assert storage.writer.timer is None and not storage.writer.dirty
+
+
+def test_flush_retries_content_changed_while_serialized(tmp_path):
+    writer = GhWriteBehind(str(tmp_path / "values.json"), None)
+    attempts = []
+
+    def serialize():
+        attempts.append(1)
+        if len(attempts) < GhWriteBehind.FLUSH_ATTEMPTS:
+            raise RuntimeError("dictionary changed size during iteration")
+        return "{}"
+
+    writer.serialize = serialize
+    writer.markDirty()
+    writer.flush()
+    assert len(attempts) == GhWriteBehind.FLUSH_ATTEMPTS
+    assert not writer.dirty
+
+    attempts.clear()
+    writer.serialize = lambda: (_ for _ in ()).throw(RuntimeError("changed"))
+    writer.markDirty()
+    writer.flush()  # never raised: pending changes are kept
+    assert writer.dirty
+
+
+def test_persistent_list_transaction_and_schedule(tmp_path, shortDelay):
+    path = str(tmp_path / "info.json")
+    values = GhPersistentList(path)
+    values.set("a", 1)
+    with values.transaction():
+        values.set("b", 2)
+        with values.transaction():
+            values.set("c", 3)
+        assert content(path) == {}
+    assert content(path) == {"a": 1, "b": 2, "c": 3}
+    values.set("d", 4)
+    values.scheduleSave()
+    assert "d" not in content(path)
+    time.sleep(0.4)
+    assert content(path)["d"] == 4